@@ -1,13 +1,15 @@
 import streamlit as st
 import os
-from pathlib import Path
-import tempfile
+import re
+import sys
 import time
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from src.document_processor import DocumentProcessor
-from src.rag_system import RAGSystem
+import uuid
+from src.component_loader import ComponentLoader
 from src.config import Config
+from src.document_registry import DocumentRegistry
+from src.ingestion import get_extraction_pool
+from src.job_queue import ACTIVE_STATUSES, RETRYABLE_STATUSES, JobQueue
+from src.query_cache import QueryCache
 
 # Page configuration
 st.set_page_config(
@@ -418,14 +420,48 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Efficient caching with TTL
-@st.cache_resource(ttl=3600)  # Cache for 1 hour
+# Cached for the life of the server so OCR models are loaded only once
+@st.cache_resource
 def initialize_system():
-    """Initialize the RAG system with efficient caching."""
-    config = Config()
-    doc_processor = DocumentProcessor(config)
-    rag_system = RAGSystem(config, doc_processor)
-    return config, doc_processor, rag_system
+    """Create the component loader; heavy models load on first use or via --preload."""
+    loader = ComponentLoader(Config())
+    if "--preload" in sys.argv[1:]:
+        loader.preload()
+    return loader
+
+def load_rag_system(loader):
+    """Return the RAG system, showing a spinner if it still needs loading."""
+    if loader.is_ready():
+        return loader.get_rag_system()
+    with st.spinner("⏳ Loading embedding models..."):
+        return loader.get_rag_system()
+
+@st.cache_resource
+def get_job_queue(_loader):
+    """Shared ingestion queue; its worker starts with --preload, on first upload, or to resume jobs."""
+    job_queue = JobQueue()
+    if "--preload" in sys.argv[1:]:
+        job_queue.start_worker(_loader)
+    return job_queue
+
+def get_session_owner():
+    """Stable id used to schedule this browser tab's jobs fairly against others."""
+    # Kept in the page URL rather than session state, which a reload discards
+    owner = st.query_params.get("owner")
+    if owner is None or not re.fullmatch(r"[0-9a-f]{32}", owner):
+        owner = uuid.uuid4().hex
+        st.query_params["owner"] = owner
+    return owner
+
+@st.cache_resource
+def get_document_registry():
+    """Registry of indexed content shared by all sessions."""
+    return DocumentRegistry()
+
+@st.cache_resource
+def get_query_cache():
+    """Answer cache shared by all sessions."""
+    return QueryCache(get_document_registry())
 
 @st.cache_data(ttl=1800)  # Cache for 30 minutes
 def get_system_stats(rag_system):
@@ -547,121 +583,104 @@ def render_sidebar(config):
         
         return llm_provider, use_ocr, extract_tables, extract_charts, similarity_threshold, max_results
 
-def process_documents_efficiently(uploaded_files, doc_processor, rag_system, use_ocr, extract_tables, extract_charts):
-    """Process documents with efficient parallel processing."""
-    progress_container = st.container()
+def render_status_card(placeholder, icon, title, detail, background, border):
+    """Render a processing status card into a placeholder."""
+    with placeholder.container():
+        st.markdown(f"""
+        <div style="background: {background}; 
+                    padding: 1rem; border-radius: 12px; margin: 0.5rem 0;
+                    border-left: 4px solid {border};">
+            <div style="display: flex; align-items: center;">
+                <div style="margin-right: 1rem; font-size: 1.2rem;">{icon}</div>
+                <div>
+                    <strong>{title}</strong><br>
+                    <small>{detail}</small>
+                </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+def enqueue_documents(uploaded_files, job_queue, loader, use_ocr, extract_tables, extract_charts):
+    """Hand uploads to the background ingestion worker."""
+    owner = get_session_owner()
+    for uploaded_file in uploaded_files:
+        job_queue.enqueue(
+            owner,
+            uploaded_file.name,
+            uploaded_file.getbuffer(),
+            use_ocr=use_ocr,
+            extract_tables=extract_tables,
+            extract_charts=extract_charts
+        )
+    job_queue.start_worker(loader)
     
-    with progress_container:
-        st.markdown("### 🔄 Processing Documents")
-        
-        progress_bar = st.progress(0, text="Initializing...")
-        status_placeholder = st.empty()
-        
-        results = []
-        
-        # Use ThreadPoolExecutor for efficient parallel processing
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            for i, uploaded_file in enumerate(uploaded_files):
-                progress = i / len(uploaded_files)
-                progress_bar.progress(progress, text=f"Processing {uploaded_file.name}...")
-                
-                # Show current status
-                with status_placeholder.container():
-                    st.markdown(f"""
-                    <div style="background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%); 
-                                padding: 1rem; border-radius: 12px; margin: 0.5rem 0;
-                                border-left: 4px solid #2196f3;">
-                        <div style="display: flex; align-items: center;">
-                            <div style="margin-right: 1rem; font-size: 1.2rem;">⏳</div>
-                            <div>
-                                <strong>Processing: {uploaded_file.name}</strong><br>
-                                <small>Extracting content...</small>
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Save file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_file_path = tmp_file.name
-                
-                try:
-                    # Process document
-                    doc_data = doc_processor.process_document(
-                        tmp_file_path,
-                        use_ocr=use_ocr,
-                        extract_tables=extract_tables,
-                        extract_charts=extract_charts
-                    )
-                    
-                    # Add to RAG system
-                    rag_system.add_document(doc_data, uploaded_file.name)
-                    
-                    results.append({
-                        'name': uploaded_file.name,
-                        'elements': len(doc_data['elements']),
-                        'status': 'success'
-                    })
-                    
-                    # Show success
-                    with status_placeholder.container():
-                        st.markdown(f"""
-                        <div style="background: linear-gradient(135deg, #e8f5e8 0%, #c8e6c9 100%); 
-                                    padding: 1rem; border-radius: 12px; margin: 0.5rem 0;
-                                    border-left: 4px solid #4caf50;">
-                            <div style="display: flex; align-items: center;">
-                                <div style="margin-right: 1rem; font-size: 1.2rem;">✅</div>
-                                <div>
-                                    <strong>Completed: {uploaded_file.name}</strong><br>
-                                    <small>Extracted {len(doc_data['elements'])} elements</small>
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                except Exception as e:
-                    results.append({
-                        'name': uploaded_file.name,
-                        'error': str(e),
-                        'status': 'error'
-                    })
-                    
-                    with status_placeholder.container():
-                        st.markdown(f"""
-                        <div style="background: linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%); 
-                                    padding: 1rem; border-radius: 12px; margin: 0.5rem 0;
-                                    border-left: 4px solid #f44336;">
-                            <div style="display: flex; align-items: center;">
-                                <div style="margin-right: 1rem; font-size: 1.2rem;">❌</div>
-                                <div>
-                                    <strong>Error: {uploaded_file.name}</strong><br>
-                                    <small>{str(e)[:100]}...</small>
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                finally:
-                    os.unlink(tmp_file_path)
-                
-                time.sleep(0.3)  # Brief pause for UX
-        
-        # Complete
-        progress_bar.progress(1.0, text="✅ Processing complete!")
-        
-        # Summary
-        success_count = len([r for r in results if r['status'] == 'success'])
-        if success_count > 0:
-            st.success(f"🎉 Successfully processed {success_count} documents!")
-        
-        # Clear status
-        time.sleep(1)
-        status_placeholder.empty()
+    st.success(
+        f"📥 Queued {len(uploaded_files)} documents. Processing continues in the background, "
+        "so you can switch tabs or reload the page."
+    )
+
+# Seconds between status refreshes while this session has documents in progress
+JOB_STATUS_REFRESH_SECONDS = 2
+
+# Status card icon, background and border colour per job status
+JOB_STATUS_STYLES = {
+    'queued': ("🕒", "linear-gradient(135deg, #f5f5f5 0%, #eeeeee 100%)", "#9e9e9e"),
+    'running': ("⏳", "linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%)", "#2196f3"),
+    'done': ("✅", "linear-gradient(135deg, #e8f5e8 0%, #c8e6c9 100%)", "#4caf50"),
+    'skipped': ("⏭️", "linear-gradient(135deg, #fff8e1 0%, #ffecb3 100%)", "#ffb300"),
+    'error': ("❌", "linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%)", "#f44336"),
+    'cancelled': ("⏹️", "linear-gradient(135deg, #f5f5f5 0%, #eeeeee 100%)", "#757575"),
+}
+
+def render_job_status(job_queue, loader):
+    """Render this session's ingestion jobs from the queue."""
+    jobs = job_queue.list_jobs(get_session_owner())
+    active = any(job['status'] in ACTIVE_STATUSES for job in jobs)
+    if st.session_state.get("jobs_active") and not active:
+        # Rerun the whole page so the chat and dashboard see the new documents
+        st.session_state.jobs_active = False
+        st.rerun()
+    st.session_state.jobs_active = active
+    if not jobs:
+        return
+    
+    st.markdown("### 🔄 Processing Status")
+    
+    for job in jobs[:10]:  # Limit display for performance
+        icon, background, border = JOB_STATUS_STYLES[job['status']]
+        if job['status'] == 'queued' and loader.error is not None:
+            detail = f"Waiting for the models to load, last attempt failed: {loader.error}"
+        elif job['status'] == 'queued':
+            detail = "Waiting for a worker..."
+        elif job['status'] == 'running':
+            detail = f"Stage: {job['stage']}"
+        elif job['status'] == 'done':
+            detail = f"Extracted {job['elements']} elements"
+        elif job['status'] == 'skipped':
+            detail = f"Skipped: {job['detail']}"
+        elif job['status'] == 'cancelled':
+            detail = "Cancelled, retry to resume from the last checkpoint"
+        else:
+            detail = f"{(job['detail'] or '')[:100]}..."
+        render_status_card(st.empty(), icon, job['filename'], detail, background, border)
         
-        return results
+        if job['status'] == 'queued':
+            if st.button("⏹️ Cancel", key=f"cancel_job_{job['id']}"):
+                job_queue.cancel(job['id'])
+                st.rerun()
+        elif job['status'] in RETRYABLE_STATUSES:
+            if st.button("🔁 Retry", key=f"retry_job_{job['id']}"):
+                job_queue.retry(job['id'])
+                job_queue.start_worker(loader)
+                st.rerun()
+    
+    if active:
+        st.caption(f"🔄 Status refreshes every {JOB_STATUS_REFRESH_SECONDS} seconds while documents are processing.")
+
+# Only this section reruns on the timer, and only while the session has jobs in progress
+poll_job_status = st.fragment(run_every=JOB_STATUS_REFRESH_SECONDS)(render_job_status)
 
-def render_chat_interface(rag_system):
+def render_chat_interface(loader, config):
     """Render efficient chat interface."""
     st.markdown("## 💬 Ask Questions")
     
@@ -688,6 +707,7 @@ def render_chat_interface(rag_system):
     
     # Process question
     if ask_button and question:
+        rag_system = load_rag_system(loader)
         if not rag_system.has_documents():
             st.warning("⚠️ Please upload documents first.")
             return
@@ -701,8 +721,15 @@ def render_chat_interface(rag_system):
                     "timestamp": time.time()
                 })
                 
-                # Get answer
-                result = rag_system.query(question)
+                # Get answer, reusing a cached one while the corpus is unchanged
+                query_cache = get_query_cache()
+                cache_key = query_cache.make_key(
+                    question, config.similarity_threshold, config.top_k_results, config.llm_provider
+                )
+                result = query_cache.get(cache_key)
+                if result is None:
+                    result = rag_system.query(question)
+                    query_cache.put(cache_key, result)
                 
                 # Add bot response
                 st.session_state.chat_history.append({
@@ -750,10 +777,22 @@ def render_chat_interface(rag_system):
                             **Content:** {source.get('content', '')[:150]}...
                             """)
 
-def render_dashboard(rag_system):
+def render_dashboard(loader, job_queue):
     """Render efficient dashboard."""
     st.markdown("### 📊 System Overview")
     
+    if not loader.is_ready():
+        if loader.is_loading():
+            st.info("⏳ Models are loading in the background. Statistics will appear shortly.")
+        elif loader.error is not None:
+            st.error(f"❌ Loading models failed: {loader.error}. Loading is retried on first use.")
+        else:
+            st.info("💤 Models load on first use. Process a document or ask a question to start.")
+        render_load_times(loader)
+        return
+    
+    rag_system = loader.get_rag_system()
+    
     # Get cached stats
     stats = get_system_stats(rag_system)
     
@@ -782,14 +821,61 @@ def render_dashboard(rag_system):
             <div class="metric-label">Queries</div>
         </div>
         """, unsafe_allow_html=True)
+    
+    query_cache = get_query_cache()
+    st.caption(
+        f"💾 Answer cache: {query_cache.hits} hits, {query_cache.misses} misses "
+        f"({query_cache.hit_rate():.0%} hit rate)"
+    )
+    
+    render_load_times(loader)
+    render_clear_collection(rag_system, job_queue)
+
+def render_clear_collection(rag_system, job_queue):
+    """Offer to empty the knowledge base once no ingestion is in progress."""
+    with st.expander("🗑️ Clear Knowledge Base", expanded=False):
+        st.warning("Removes every indexed document. Uploads have to be processed again.")
+        busy = job_queue.has_unfinished()
+        if busy:
+            st.info("⏳ Wait for queued documents to finish processing before clearing.")
+        if st.button("🗑️ Clear All Documents", disabled=busy, use_container_width=True):
+            rag_system.clear_collection()
+            # Forgetting the hashes bumps the collection version, so cached answers miss too
+            get_document_registry().clear()
+            get_query_cache().clear()
+            get_system_stats.clear()
+            st.rerun()
+
+def render_load_times(loader):
+    """Render import and model load timings."""
+    with st.expander("⏱️ Model Load Times", expanded=False):
+        for module_name, seconds in dict(loader.import_times).items():
+            st.markdown(f"**import {module_name}:** {seconds:.2f}s")
+        
+        for component, seconds in dict(loader.load_times).items():
+            st.markdown(f"**{component}:** {seconds:.2f}s")
+        
+        worker_times = dict(get_extraction_pool().load_times)
+        if worker_times:
+            st.markdown(
+                f"**Extraction workers:** {len(worker_times)} warm, "
+                f"slowest load {max(worker_times.values()):.2f}s"
+            )
+        else:
+            st.markdown("**Extraction workers:** not started yet")
 
 def main():
     """Optimized main application."""
     # Render header
     render_header()
     
-    # Initialize system with caching
-    config, doc_processor, rag_system = initialize_system()
+    # Heavy components are loaded lazily so the first page is served immediately
+    loader = initialize_system()
+    config = loader.config
+    job_queue = get_job_queue(loader)
+    # Restart the worker if it died while jobs were still queued or running
+    if job_queue.has_unfinished():
+        job_queue.start_worker(loader)
     
     # Render features
     render_features()
@@ -821,7 +907,7 @@ def main():
             # Show file list efficiently
             st.markdown("### 📋 Selected Files")
             for file in uploaded_files[:5]:  # Limit display for performance
-                file_size = len(file.getvalue()) / (1024 * 1024)
+                file_size = file.size / (1024 * 1024)
                 st.markdown(f"""
                 <div class="file-item">
                     <div>
@@ -841,16 +927,22 @@ def main():
                     st.error("⚠️ Please configure your API key first!")
                     return
                 
-                process_documents_efficiently(
-                    uploaded_files, doc_processor, rag_system, 
+                enqueue_documents(
+                    uploaded_files, job_queue, loader,
                     use_ocr, extract_tables, extract_charts
                 )
+        
+        jobs = job_queue.list_jobs(get_session_owner())
+        if any(job['status'] in ACTIVE_STATUSES for job in jobs):
+            poll_job_status(job_queue, loader)
+        else:
+            render_job_status(job_queue, loader)
     
     with tab2:
-        render_chat_interface(rag_system)
+        render_chat_interface(loader, config)
     
     with tab3:
-        render_dashboard(rag_system)
+        render_dashboard(loader, job_queue)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,137 @@
+"""
+Lazy loading of the heavy document processing and RAG components.
+
+Importing the document processor and RAG system pulls in torch, EasyOCR,
+OpenCV, sentence-transformers, ChromaDB and LangChain, which takes long
+enough to delay the first page and trip deployment health checks. The loader
+defers those imports until first use, can warm them in a background thread
+after the UI is served, and records how long each step took.
+
+Extraction runs in the process pool, which builds its own DocumentProcessor
+per worker, so processes that only embed and query get a stand-in processor
+and never load the OCR models unless something actually uses it.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Third-party modules imported ahead of the project modules so the import-time
+# report attributes cost to the library that incurs it
+HEAVY_MODULES = (
+    'torch',
+    'sentence_transformers',
+    'chromadb',
+    'langchain',
+)
+
+# Imported only when a real DocumentProcessor is built
+VISION_MODULES = (
+    'cv2',
+    'easyocr',
+)
+
+
+class LazyDocumentProcessor:
+    """Stand-in passed to RAGSystem that builds the real DocumentProcessor on first use."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader.get_document_processor(), name)
+
+
+class ComponentLoader:
+    """Build DocumentProcessor and RAGSystem once, on demand or in the background."""
+
+    def __init__(self, config):
+        self.config = config
+        self.import_times = {}
+        self.load_times = {}
+        self.error = None
+        self._rag_system = None
+        self._doc_processor = None
+        self._lock = threading.Lock()
+        self._processor_lock = threading.Lock()
+
+    def is_ready(self):
+        """Whether the RAG system is loaded and can be used without waiting."""
+        return self._rag_system is not None
+
+    def is_loading(self):
+        """Whether another thread is currently loading the RAG system."""
+        return self._lock.locked() and self._rag_system is None
+
+    def get_rag_system(self):
+        """Return the RAGSystem, loading it on first call."""
+        if self._rag_system is None:
+            with self._lock:
+                if self._rag_system is None:
+                    try:
+                        self._rag_system = self._load_rag_system()
+                    except Exception as e:
+                        # Kept for the UI, since callers such as the queue worker run in the background
+                        self.error = e
+                        raise
+                    self.error = None
+        return self._rag_system
+
+    def get_document_processor(self):
+        """Return a real DocumentProcessor, loading the OCR models on first call."""
+        if self._doc_processor is None:
+            with self._processor_lock:
+                if self._doc_processor is None:
+                    self._doc_processor = self._load_document_processor()
+        return self._doc_processor
+
+    def preload(self):
+        """Load the RAG system in a background thread."""
+        def run():
+            try:
+                self.get_rag_system()
+            except Exception as e:
+                logger.error(f"Background preload failed: {e}")
+
+        thread = threading.Thread(target=run, name="component-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _import(self, module_name, required=True):
+        start = time.time()
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            if required:
+                raise
+            return None
+        self.import_times[module_name] = time.time() - start
+        return module
+
+    def _load_rag_system(self):
+        total_start = time.time()
+        for module_name in HEAVY_MODULES:
+            self._import(module_name, required=False)
+
+        rag_system = self._import('src.rag_system')
+
+        start = time.time()
+        rag = rag_system.RAGSystem(self.config, LazyDocumentProcessor(self))
+        self.load_times['RAG system'] = time.time() - start
+
+        logger.info(f"RAG system loaded in {time.time() - total_start:.2f}s; imports: {self.import_times}")
+        return rag
+
+    def _load_document_processor(self):
+        for module_name in VISION_MODULES:
+            self._import(module_name, required=False)
+
+        document_processor = self._import('src.document_processor')
+
+        start = time.time()
+        doc_processor = document_processor.DocumentProcessor(self.config)
+        self.load_times['Document processor'] = time.time() - start
+        return doc_processor
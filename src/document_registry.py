@@ -0,0 +1,157 @@
+"""
+Registry of content hashes for documents and elements already in the vector store.
+
+Lets the ingestion pipeline skip re-embedding a re-uploaded document (even
+under a different filename) and drop elements whose exact content is already
+indexed. Documents are recorded with the extraction options they were
+ingested with, so asking for more (e.g. OCR on a scan first ingested without
+it) extracts the document again. The registry lives next to the ChromaDB files so that removing the
+database also resets it.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+def element_hash(element):
+    """Hash an extracted element by type and normalized content."""
+    content = ' '.join(str(element.content).split())
+    return hashlib.sha256(f"{element.element_type}\x00{content}".encode('utf-8')).hexdigest()
+
+
+class DocumentRegistry:
+    """SQLite-backed record of ingested document and element hashes."""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or os.getenv("DOCUMENT_REGISTRY_PATH", "./chroma_db/document_registry.sqlite3"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    content_hash TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    elements INTEGER NOT NULL,
+                    use_ocr INTEGER NOT NULL,
+                    extract_tables INTEGER NOT NULL,
+                    extract_charts INTEGER NOT NULL,
+                    ingested_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS elements (
+                    content_hash TEXT PRIMARY KEY,
+                    document_hash TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS collection_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO collection_state (id, version) VALUES (1, 0)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the registry safe across Streamlit sessions
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE collection_state SET version = version + 1 WHERE id = 1")
+
+    def version(self):
+        """Counter that changes whenever the indexed collection changes."""
+        with self._connect() as conn:
+            return conn.execute("SELECT version FROM collection_state WHERE id = 1").fetchone()[0]
+
+    def get_document(self, content_hash):
+        """Return the stored record for a document hash, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT filename, elements, use_ocr, extract_tables, extract_charts, ingested_at
+                   FROM documents WHERE content_hash = ?""",
+                (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'filename': row[0],
+            'elements': row[1],
+            'use_ocr': bool(row[2]),
+            'extract_tables': bool(row[3]),
+            'extract_charts': bool(row[4]),
+            'ingested_at': row[5],
+        }
+
+    def find_document(self, content_hash, use_ocr=True, extract_tables=True, extract_charts=True):
+        """
+        Return the record for a document hash if it was ingested with at least
+        the given extraction options, or None if it needs to be ingested.
+        """
+        record = self.get_document(content_hash)
+        if record is None:
+            return None
+        requested = {'use_ocr': use_ocr, 'extract_tables': extract_tables, 'extract_charts': extract_charts}
+        if any(enabled and not record[option] for option, enabled in requested.items()):
+            return None
+        return record
+
+    def filter_new_elements(self, elements):
+        """Return the elements whose content is not indexed yet, with their hashes."""
+        new_elements = []
+        seen = set()
+        with self._connect() as conn:
+            for element in elements:
+                digest = element_hash(element)
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                exists = conn.execute(
+                    "SELECT 1 FROM elements WHERE content_hash = ?", (digest,)
+                ).fetchone()
+                if not exists:
+                    new_elements.append((digest, element))
+        return new_elements
+
+    def add_document(self, content_hash, filename, element_hashes,
+                     use_ocr=True, extract_tables=True, extract_charts=True):
+        """
+        Record a document, the element hashes stored for it and the extraction
+        options used. Re-ingesting a known document adds to its element count
+        and widens its options; the original filename is kept.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO documents (content_hash, filename, elements, use_ocr, extract_tables,
+                                        extract_charts, ingested_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (content_hash) DO UPDATE SET
+                       elements = elements + excluded.elements,
+                       use_ocr = MAX(use_ocr, excluded.use_ocr),
+                       extract_tables = MAX(extract_tables, excluded.extract_tables),
+                       extract_charts = MAX(extract_charts, excluded.extract_charts),
+                       ingested_at = excluded.ingested_at""",
+                (content_hash, filename, len(element_hashes), int(use_ocr), int(extract_tables),
+                 int(extract_charts), time.time())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO elements (content_hash, document_hash) VALUES (?, ?)",
+                [(digest, content_hash) for digest in element_hashes]
+            )
+            if element_hashes:
+                self._bump_version(conn)
+
+    def clear(self):
+        """Forget all documents, e.g. after the vector store was cleared."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM documents")
+            conn.execute("DELETE FROM elements")
+            self._bump_version(conn)
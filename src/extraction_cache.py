@@ -0,0 +1,203 @@
+"""
+Content-addressed on-disk cache for DocumentProcessor.process_document results.
+
+Entries are keyed on the SHA-256 of the file bytes, the extraction flags and
+the extraction code and library versions, so renamed re-uploads hit the cache
+while an upgraded OCR or table library, or a change to DocumentProcessor,
+invalidates it. The directory is bounded in size with least-recently-used
+eviction based on file modification times.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bump when the serialized element format changes
+CACHE_FORMAT_VERSION = 1
+
+# Bump whenever a change to src/document_processor.py changes its output
+EXTRACTION_LOGIC_VERSION = 1
+
+# Packages whose versions affect extraction output
+EXTRACTOR_PACKAGES = (
+    'easyocr',
+    'pytesseract',
+    'opencv-python',
+    'opencv-python-headless',
+    'tabula-py',
+    'PyPDF2',
+    'pdf2image',
+    'pillow',
+)
+
+
+@lru_cache(maxsize=1)
+def extractor_versions():
+    """Return the installed versions of the extraction libraries."""
+    versions = {}
+    for package in EXTRACTOR_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def sha256_buffer(buffer):
+    """Hash an in-memory buffer (bytes or memoryview) without copying it."""
+    return hashlib.sha256(buffer).hexdigest()
+
+
+def sha256_file(path, block_size=1024 * 1024):
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of serialized extraction results."""
+
+    # Seconds between directory scans while under budget
+    SCAN_INTERVAL = 60.0
+
+    # Fraction of the budget that eviction frees space down to
+    EVICT_TO = 0.9
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir or os.getenv("EXTRACTION_CACHE_DIR", "./extraction_cache"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "1024")) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Estimated directory size: measured by the last scan plus this process's writes since
+        self._size = None
+        self._scanned_at = 0.0
+
+    def make_key(self, content_hash, use_ocr, extract_tables, extract_charts):
+        """Build the cache key for a document and a set of extraction options."""
+        payload = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'extraction_logic': EXTRACTION_LOGIC_VERSION,
+            'content': content_hash,
+            'use_ocr': bool(use_ocr),
+            'extract_tables': bool(extract_tables),
+            'extract_charts': bool(extract_charts),
+            'extractors': extractor_versions(),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def shard_key(self, cache_key, first_page, last_page):
+        """Build the key for a page range of the document identified by cache_key."""
+        return hashlib.sha256(f"{cache_key}:{first_page}-{last_page}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        """Return the cached document data for a key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                doc_data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # Refresh the access time used for LRU eviction; another process may
+        # have evicted the entry since it was read, which is fine
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return doc_data
+
+    def put(self, key, doc_data):
+        """Store document data, evicting old entries if over the size budget."""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        # Write to a temp file and rename so concurrent workers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(doc_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry {path.name}: {e}")
+            Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        if self._size is not None:
+            try:
+                self._size += path.stat().st_size - replaced
+            except FileNotFoundError:
+                # Evicted by another process straight after the rename
+                self._size -= replaced
+        self.evict()
+
+    def delete(self, key):
+        """Remove an entry if it exists."""
+        path = self._entry_path(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def evict(self):
+        """
+        Delete least recently used entries once the cache exceeds its budget.
+
+        The directory is only scanned when the running size estimate is over
+        budget, or when the last scan is older than SCAN_INTERVAL seconds to
+        pick up entries written by other worker processes. Eviction goes down
+        to EVICT_TO of the budget so the next few writes do not scan again.
+        """
+        if (
+            self._size is not None
+            and self._size <= self.max_bytes
+            and time.time() - self._scanned_at < self.SCAN_INTERVAL
+        ):
+            return
+
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            target = self.max_bytes * self.EVICT_TO
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= target:
+                    break
+
+        self._size = total
+        self._scanned_at = time.time()
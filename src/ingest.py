@@ -0,0 +1,124 @@
+"""
+Headless bulk ingestion for directory trees.
+
+Usage:
+    python -m src.ingest /data/docs --workers 8 --report ingest_report.jsonl
+
+Walks the directory, filters by the supported extensions, skips content that
+is already indexed, runs the parallel extraction/embedding pipeline and writes
+one JSON line per file with its timings and element counts.
+
+ChromaDB's embedded client is not safe to share between processes, so stop
+the Streamlit app before running this against the same database.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from src.ingestion import SUPPORTED_EXTENSIONS, IngestionPipeline
+from src.text_ingest import is_text_document
+
+
+def find_documents(root):
+    """Return supported files under root in a stable order."""
+    return sorted(
+        path for path in Path(root).rglob('*')
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def format_duration(seconds):
+    """Format seconds as h:mm:ss."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of documents into the RAG index.")
+    parser.add_argument("directory", help="Directory to scan recursively")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction worker processes (default: CPU count)")
+    parser.add_argument("--report", default="ingest_report.jsonl", help="JSONL report path (appended to)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Files handed to the pipeline at a time (default: 8 per worker)")
+    parser.add_argument("--no-ocr", action="store_true", help="Disable OCR")
+    parser.add_argument("--no-tables", action="store_true", help="Disable table extraction")
+    parser.add_argument("--no-charts", action="store_true", help="Disable chart detection")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root = Path(args.directory)
+    if not root.is_dir():
+        print(f"❌ Not a directory: {root}")
+        return 1
+
+    documents = find_documents(root)
+    total = len(documents)
+    print(f"📂 Found {total} supported documents under {root}")
+    if not documents:
+        return 0
+
+    from src.component_loader import ComponentLoader
+    from src.config import Config
+
+    print("⏳ Loading embedding models...")
+    rag_system = ComponentLoader(Config()).get_rag_system()
+    pipeline = IngestionPipeline(rag_system, max_workers=args.workers)
+    # Text and Markdown are parsed inline; the extraction workers only start if something needs them
+    if not all(is_text_document(path) for path in documents):
+        print("⏳ Starting extraction workers...")
+        pipeline.pool.warm_up()
+    batch_size = args.batch_size or pipeline.pool.max_workers * 8
+
+    counts = {'success': 0, 'skipped': 0, 'error': 0}
+    start = time.time()
+
+    def on_progress(event):
+        if event['event'] not in counts and event['event'] != 'completed':
+            return
+        status = 'success' if event['event'] == 'completed' else event['event']
+        counts[status] += 1
+        done = sum(counts.values())
+        elapsed = time.time() - start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        print(f"[{done}/{total}] {rate:.2f} files/s, ETA {format_duration(eta)} - {status}: {event['name']}")
+
+    with open(args.report, 'a', encoding='utf-8') as report:
+        for offset in range(0, total, batch_size):
+            batch = documents[offset:offset + batch_size]
+            # Relative paths keep names unique and meaningful as source attributions
+            files = [(str(path.relative_to(root)), path) for path in batch]
+            results = pipeline.run(
+                files,
+                use_ocr=not args.no_ocr,
+                extract_tables=not args.no_tables,
+                extract_charts=not args.no_charts,
+                progress_callback=on_progress
+            )
+            for result in results:
+                report.write(json.dumps({'path': str(root / result['name']), **result}) + '\n')
+            report.flush()
+
+    elapsed = time.time() - start
+    print(
+        f"\n✅ Ingested {counts['success']}, skipped {counts['skipped']}, failed {counts['error']} "
+        f"in {format_duration(elapsed)} ({total / elapsed:.2f} files/s)"
+    )
+    print(f"📄 Report written to {args.report}")
+
+    pipeline.pool.shutdown()
+    return 0 if counts['error'] == 0 else 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(main())
@@ -0,0 +1,512 @@
+"""
+Parallel document ingestion pipeline.
+
+Extraction (OCR, tables, charts) is CPU bound and runs in a long-lived process
+pool sized to the available cores. Embedding and ChromaDB writes run as a second stage on
+the calling thread, overlapping with extraction of the remaining files.
+"""
+
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from src.document_registry import DocumentRegistry
+from src.extraction_cache import ExtractionCache, sha256_file
+from src.text_ingest import TEXT_OPTIONS, is_text_document, process_text_document
+
+logger = logging.getLogger(__name__)
+
+# File types accepted by the upload widget and the bulk ingestion CLI
+SUPPORTED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.txt', '.md'}
+
+# Per-process document processor and extraction cache, created once by the pool initializer
+_worker_processor = None
+_worker_cache = None
+_worker_load_time = None
+
+
+def _init_worker():
+    """Build one DocumentProcessor and cache handle per worker process."""
+    try:
+        _load_worker_processor()
+    except Exception as e:
+        # A failing initializer would break the whole pool; instead each
+        # extraction retries the load and reports the error on its document
+        logger.error(f"Extraction worker could not load the document processor: {e}")
+
+
+def _load_worker_processor():
+    """Return this worker's DocumentProcessor, loading it if an earlier attempt failed."""
+    global _worker_processor, _worker_cache, _worker_load_time
+    if _worker_cache is None:
+        _worker_cache = ExtractionCache()
+    if _worker_processor is None:
+        start = time.time()
+        from src.config import Config
+        from src.document_processor import DocumentProcessor
+
+        _worker_processor = DocumentProcessor(Config())
+        _worker_load_time = time.time() - start
+    return _worker_processor
+
+
+def _worker_status(hold=0.0):
+    """Report which worker ran the call and how long its models took to load."""
+    # Holding the worker briefly makes the pool start a new process for the next call
+    time.sleep(hold)
+    return os.getpid(), _worker_load_time
+
+
+def _extract_document(path, cache_key, use_ocr, extract_tables, extract_charts):
+    """Run extraction for a single file inside a worker process."""
+    start = time.time()
+    doc_data = _load_worker_processor().process_document(
+        path,
+        use_ocr=use_ocr,
+        extract_tables=extract_tables,
+        extract_charts=extract_charts
+    )
+    _worker_cache.put(cache_key, doc_data)
+    return doc_data, time.time() - start, _worker_status()
+
+
+def _extract_page_range(path, first_page, last_page, shard_key, use_ocr, extract_tables, extract_charts):
+    """Extract pages [first_page, last_page) of a PDF inside a worker process."""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    start = time.time()
+    reader = PdfReader(path)
+    writer = PdfWriter()
+    for index in range(first_page, last_page):
+        writer.add_page(reader.pages[index])
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as shard_file:
+        writer.write(shard_file)
+        shard_path = shard_file.name
+
+    try:
+        doc_data = _load_worker_processor().process_document(
+            shard_path,
+            use_ocr=use_ocr,
+            extract_tables=extract_tables,
+            extract_charts=extract_charts
+        )
+    finally:
+        os.unlink(shard_path)
+
+    # Shards number their pages from 1; shift them back to document page numbers
+    for element in doc_data['elements']:
+        metadata = getattr(element, 'metadata', None)
+        if isinstance(metadata, dict) and isinstance(metadata.get('page'), int):
+            metadata['page'] += first_page
+
+    # Checkpoint the finished range so an interrupted document resumes from here
+    _worker_cache.put(shard_key, doc_data)
+    return doc_data, time.time() - start, _worker_status()
+
+
+def default_worker_count():
+    """Number of extraction workers, overridable with INGEST_WORKERS."""
+    configured = os.getenv("INGEST_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def default_shard_pages():
+    """Pages per shard for large PDFs, overridable with INGEST_SHARD_PAGES."""
+    return max(1, int(os.getenv("INGEST_SHARD_PAGES", "25")))
+
+
+def page_ranges(path, shard_pages):
+    """Split a PDF into page ranges, or return None if it is small or not a PDF."""
+    if Path(path).suffix.lower() != '.pdf':
+        return None
+    try:
+        from PyPDF2 import PdfReader
+        page_count = len(PdfReader(path).pages)
+    except Exception as e:
+        logger.warning(f"Could not count pages in {path}, extracting it whole: {e}")
+        return None
+    if page_count <= shard_pages:
+        return None
+    return [(first, min(first + shard_pages, page_count)) for first in range(0, page_count, shard_pages)]
+
+
+# Document metadata keys that hold the page count
+PAGE_COUNT_KEYS = ('total_pages', 'page_count', 'num_pages', 'pages')
+
+
+def assign_element_ids(elements, content_hash):
+    """
+    Give every element a stable element_id of the form
+    "<content hash>:<page>:<index on page>".
+
+    IDs depend only on the document content and element order, so they are
+    the same whether the result was extracted whole, merged from shards,
+    parsed as text or loaded from the cache.
+    """
+    positions = Counter()
+    for element in elements:
+        element_metadata = getattr(element, 'metadata', None)
+        if isinstance(element_metadata, dict):
+            page = element_metadata.get('page', 0)
+            element_metadata['element_id'] = f"{content_hash}:{page}:{positions[page]}"
+            positions[page] += 1
+
+
+def merge_shards(parts, page_count):
+    """
+    Reassemble per-shard results in page order into one document result.
+
+    Metadata fields that differ between shards, such as temporary file names,
+    describe a shard rather than the document and are dropped; page and
+    element counts are recomputed.
+    """
+    elements = []
+    for part in parts:
+        elements.extend(part['elements'])
+
+    shard_metadata = [part.get('metadata', {}) for part in parts]
+    metadata = {
+        key: value for key, value in shard_metadata[0].items()
+        if all(key in other and other[key] == value for other in shard_metadata[1:])
+    }
+    for key in PAGE_COUNT_KEYS:
+        if isinstance(shard_metadata[0].get(key), int):
+            metadata[key] = page_count
+
+    element_types = shard_metadata[0].get('element_types')
+    if isinstance(element_types, dict):
+        merged = Counter()
+        for part_metadata in shard_metadata:
+            merged.update(part_metadata.get('element_types', {}))
+        metadata['element_types'] = dict(merged)
+    elif isinstance(element_types, list):
+        merged = []
+        for part_metadata in shard_metadata:
+            for element_type in part_metadata.get('element_types', []):
+                if element_type not in merged:
+                    merged.append(element_type)
+        metadata['element_types'] = merged
+    if 'total_elements' in shard_metadata[0]:
+        metadata['total_elements'] = len(elements)
+    metadata['shards'] = len(parts)
+
+    return {**parts[0], 'elements': elements, 'metadata': metadata}
+
+
+class ExtractionPool:
+    """
+    Long-lived extraction workers that each keep a warm DocumentProcessor.
+
+    OCR models are loaded once per worker process and reused for every
+    document submitted afterwards, by any session in this server process.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_worker_count()
+        self.load_times = {}
+        self._executor = None
+        self._terminated = False
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._terminated:
+                raise RuntimeError("Extraction pool has been terminated")
+            if self._executor is None:
+                # Spawn keeps workers clear of torch/OpenMP state already loaded in the parent
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context, initializer=_init_worker
+                )
+            return self._executor
+
+    def submit(self, fn, *args):
+        """Submit a call, restarting the workers if a previous one crashed."""
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("Extraction pool was broken, restarting workers")
+            self.shutdown(wait=False)
+            return self._get_executor().submit(fn, *args)
+
+    def record_worker(self, status):
+        """Remember the model load time reported by a worker."""
+        pid, load_time = status
+        self.load_times[pid] = load_time
+
+    def warm_up(self):
+        """Start every worker so the first document does not pay model load time."""
+        futures = [self.submit(_worker_status, 0.5) for _ in range(self.max_workers)]
+        for future in futures:
+            self.record_worker(future.result())
+        logger.info(f"Extraction workers ready: {self.load_times}")
+        return dict(self.load_times)
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+                self.load_times.clear()
+
+    def terminate(self):
+        """
+        Kill the worker processes without waiting for running extractions.
+
+        Pending calls fail with BrokenProcessPool and the pool refuses new
+        work, so callers stop instead of restarting it.
+
+        ProcessPoolExecutor only gained a public way to kill running calls,
+        terminate_workers, in Python 3.14. Older versions terminate the
+        worker processes in the executor's _processes mapping (pid to
+        Process in every CPython release from 3.9, the minimum this code
+        needs for shutdown(cancel_futures=True)).
+        """
+        with self._lock:
+            self._terminated = True
+            executor, self._executor = self._executor, None
+            self.load_times.clear()
+        if executor is None:
+            return
+        if hasattr(executor, 'terminate_workers'):
+            executor.terminate_workers()
+            return
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers=None):
+    """Return the process-wide extraction pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(max_workers)
+        return _pool
+
+
+class IngestionPipeline:
+    """Two-stage ingestion: parallel extraction, then embedding and storage."""
+
+    def __init__(self, rag_system, max_workers=None, cache=None, registry=None, pool=None, shard_pages=None):
+        self.rag_system = rag_system
+        self.pool = pool or get_extraction_pool(max_workers)
+        self.shard_pages = shard_pages or default_shard_pages()
+        self.cache = cache or ExtractionCache()
+        self.registry = registry or DocumentRegistry()
+
+    def run(self, files, use_ocr=True, extract_tables=True, extract_charts=True, progress_callback=None):
+        """
+        Ingest a batch of files.
+
+        Args:
+            files: List of (name, path) tuples
+            use_ocr: Whether to run OCR during extraction
+            extract_tables: Whether to extract tables
+            extract_charts: Whether to detect charts
+            progress_callback: Optional callable receiving one event dict per
+                state change; always invoked on the calling thread
+
+        Returns:
+            List of per-file result dicts in completion order
+        """
+        files = list(files)
+        total = len(files)
+        results = []
+        if not files:
+            return results
+
+        def notify(event, **fields):
+            if progress_callback:
+                progress_callback({'event': event, 'done': len(results), 'total': total, **fields})
+
+        extraction_options = (use_ocr, extract_tables, extract_charts)
+
+        def store(name, content_hash, doc_data, extract_time, cached, options):
+            """Embedding stage: add content not yet indexed to the vector store."""
+            notify('extracted', name=name, elements=len(doc_data['elements']), cached=cached)
+
+            # Documents that add nothing are not registered, so a later upload
+            # with more extraction enabled is not mistaken for a duplicate
+            if not doc_data['elements']:
+                skip(name, "no content was extracted")
+                return
+            assign_element_ids(doc_data['elements'], content_hash)
+            new_elements = self.registry.filter_new_elements(doc_data['elements'])
+            if not new_elements:
+                skip(name, "all extracted content is already indexed")
+                return
+
+            embed_start = time.time()
+            self.rag_system.add_document({**doc_data, 'elements': [element for _, element in new_elements]}, name)
+            self.registry.add_document(content_hash, name, [digest for digest, _ in new_elements], *options)
+            embed_time = time.time() - embed_start
+
+            results.append({
+                'name': name,
+                'content_hash': content_hash,
+                'elements': len(doc_data['elements']),
+                'new_elements': len(new_elements),
+                'extract_time': extract_time,
+                'embed_time': embed_time,
+                'cached': cached,
+                'status': 'success'
+            })
+            notify('completed', name=name, elements=len(doc_data['elements']))
+
+        def skip(name, reason):
+            results.append({
+                'name': name,
+                'reason': reason,
+                'status': 'skipped'
+            })
+            notify('skipped', name=name, reason=reason)
+
+        def fail(name, error):
+            logger.error(f"Failed to ingest {name}: {error}")
+            results.append({
+                'name': name,
+                'error': str(error),
+                'status': 'error'
+            })
+            notify('error', name=name, error=str(error))
+
+        # Skip already-indexed content and handle text files and known documents
+        # without starting workers
+        pending = []
+        batch_hashes = {}
+        for name, path in files:
+            try:
+                lookup_start = time.time()
+                content_hash = sha256_file(path)
+                text = is_text_document(name)
+                options = TEXT_OPTIONS if text else extraction_options
+                existing = self.registry.find_document(content_hash, *options)
+                if existing:
+                    skip(name, f"duplicate of {existing['filename']}")
+                    continue
+                if content_hash in batch_hashes:
+                    skip(name, f"duplicate of {batch_hashes[content_hash]}")
+                    continue
+                batch_hashes[content_hash] = name
+
+                # Text and Markdown are parsed inline without the vision stack
+                if text:
+                    doc_data = process_text_document(path)
+                    store(name, content_hash, doc_data, time.time() - lookup_start, False, options)
+                    continue
+
+                cache_key = self.cache.make_key(content_hash, use_ocr, extract_tables, extract_charts)
+                doc_data = self.cache.get(cache_key)
+                if doc_data is None:
+                    pending.append((name, path, content_hash, cache_key))
+                    notify('queued', name=name)
+                else:
+                    store(name, content_hash, doc_data, time.time() - lookup_start, True, options)
+            except Exception as e:
+                fail(name, e)
+
+        if not pending:
+            return results
+
+        # Large PDFs are split into page ranges so a single document uses every worker
+        futures = {}
+        shards = {}
+        failed = set()
+
+        def finish_shards(name, document, cached):
+            doc_data = merge_shards(document['parts'], document['page_count'])
+            self.cache.put(document['cache_key'], doc_data)
+            # The merged entry supersedes the checkpoints, which would otherwise count twice
+            for shard_key in document['shard_keys']:
+                self.cache.delete(shard_key)
+            store(name, document['content_hash'], doc_data, time.time() - document['started'], cached,
+                  extraction_options)
+
+        for name, path, content_hash, cache_key in pending:
+            try:
+                ranges = page_ranges(path, self.shard_pages)
+                if ranges is None:
+                    future = self.pool.submit(
+                        _extract_document, str(path), cache_key, use_ocr, extract_tables, extract_charts
+                    )
+                    futures[future] = (name, None)
+                    shards[name] = {'content_hash': content_hash}
+                    continue
+
+                document = {
+                    'content_hash': content_hash,
+                    'cache_key': cache_key,
+                    'page_count': ranges[-1][1],
+                    'shard_keys': [
+                        self.cache.shard_key(cache_key, first_page, last_page)
+                        for first_page, last_page in ranges
+                    ],
+                    'parts': [None] * len(ranges),
+                    'remaining': len(ranges),
+                    'started': time.time()
+                }
+                shards[name] = document
+
+                # Ranges checkpointed by an earlier, interrupted run are not extracted again
+                for index, (first_page, last_page) in enumerate(ranges):
+                    shard_key = document['shard_keys'][index]
+                    checkpoint = self.cache.get(shard_key)
+                    if checkpoint is not None:
+                        document['parts'][index] = checkpoint
+                        document['remaining'] -= 1
+                        continue
+                    future = self.pool.submit(
+                        _extract_page_range, str(path), first_page, last_page, shard_key,
+                        use_ocr, extract_tables, extract_charts
+                    )
+                    futures[future] = (name, index)
+
+                resumed = len(ranges) - document['remaining']
+                if resumed:
+                    notify('resumed', name=name, shards=resumed, total_shards=len(ranges))
+                if document['remaining'] == 0:
+                    finish_shards(name, document, True)
+            except Exception as e:
+                # Shards already submitted for this document are ignored when they complete
+                failed.add(name)
+                fail(name, e)
+
+        for future in as_completed(futures):
+            name, shard_index = futures[future]
+            if name in failed:
+                continue
+            document = shards[name]
+            try:
+                doc_data, extract_time, worker = future.result()
+                self.pool.record_worker(worker)
+
+                if shard_index is None:
+                    store(name, document['content_hash'], doc_data, extract_time, False, extraction_options)
+                    continue
+
+                document['parts'][shard_index] = doc_data
+                document['remaining'] -= 1
+                if document['remaining'] == 0:
+                    finish_shards(name, document, False)
+            except Exception as e:
+                failed.add(name)
+                fail(name, e)
+
+        return results
+
@@ -0,0 +1,426 @@
+"""
+Durable background ingestion queue.
+
+The Streamlit script run only enqueues uploads and polls their status; a
+worker thread owned by the server process does the ingestion, so it survives
+script reruns, tab switches and browser disconnects. The worker writes through
+the same RAGSystem the app queries, because ChromaDB's embedded client is not
+safe to share between processes; extraction still runs in the process pool.
+Jobs and their spooled files live on disk, and jobs are claimed round-robin
+across owners so one user's large upload does not starve everyone else's.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.document_registry import DocumentRegistry
+from src.extraction_cache import sha256_buffer
+from src.ingestion import IngestionPipeline, get_extraction_pool
+from src.text_ingest import TEXT_OPTIONS, is_text_document
+
+logger = logging.getLogger(__name__)
+
+# Job states that are still waiting for or receiving work
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Job states that can be queued again with JobQueue.retry
+RETRYABLE_STATUSES = ('error', 'cancelled')
+
+# Seconds a claimed job stays reserved for its worker without a heartbeat
+LEASE_SECONDS = 120
+
+# Seconds the worker gets to finish its batch at server exit before extraction is killed
+WORKER_STOP_TIMEOUT = 60
+
+class JobQueue:
+    """SQLite-backed queue of document ingestion jobs."""
+
+    def __init__(self, db_path=None, spool_dir=None, registry=None):
+        self.db_path = Path(db_path or os.getenv("JOB_QUEUE_PATH", "./chroma_db/ingest_jobs.sqlite3"))
+        self.spool_dir = Path(spool_dir or os.getenv("INGEST_SPOOL_DIR", "./ingest_spool"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.registry = registry or DocumentRegistry()
+        self._worker = None
+        self._stop_event = None
+        self._exit_hook_registered = False
+        self._worker_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    owner TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    use_ocr INTEGER NOT NULL,
+                    extract_tables INTEGER NOT NULL,
+                    extract_charts INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    elements INTEGER,
+                    detail TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    content_hash TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS owners (
+                    owner TEXT PRIMARY KEY,
+                    last_served REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, owner, filename, buffer, use_ocr=True, extract_tables=True, extract_charts=True):
+        """
+        Spool an upload to disk and queue it for ingestion.
+
+        Content that is already indexed with at least the requested extraction
+        options is recorded as a skipped job without being written to disk.
+        A copy of a job that is still queued or running is queued as well; the
+        worker runs it after the original, so it is skipped if the original
+        was indexed and ingested if the original failed or was cancelled.
+
+        Returns:
+            The new job id
+        """
+        content_hash = sha256_buffer(buffer)
+        options = (int(use_ocr), int(extract_tables), int(extract_charts))
+        existing = self.registry.find_document(
+            content_hash, *(TEXT_OPTIONS if is_text_document(filename) else options)
+        )
+        if existing:
+            return self._insert_job(
+                owner, filename, '', options, content_hash, 'skipped', f"duplicate of {existing['filename']}"
+            )
+        path = self.spool_dir / f"{uuid.uuid4().hex}{Path(filename).suffix}"
+        with open(path, 'wb') as f:
+            f.write(buffer)
+        return self._insert_job(owner, filename, str(path), options, content_hash, 'queued')
+
+    def _insert_job(self, owner, filename, path, options, content_hash, status, detail=None):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """INSERT INTO jobs (owner, filename, path, use_ocr, extract_tables, extract_charts,
+                                     content_hash, status, detail, created_at, finished_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (owner, filename, path, *options, content_hash, status, detail, now,
+                 None if status == 'queued' else now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id):
+        """
+        Lease the next job to a worker and return it, or None if the queue is empty.
+
+        The next job belongs to the owner who was served least recently, so
+        owners take turns regardless of how many files each has queued. The
+        worker must renew its leases with renew_leases until the job finishes.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT jobs.* FROM jobs
+                LEFT JOIN owners ON owners.owner = jobs.owner
+                WHERE jobs.status = 'queued'
+                ORDER BY COALESCE(owners.last_served, 0), jobs.id
+                LIMIT 1
+            """).fetchone()
+            if row is None:
+                return None
+
+            now = time.time()
+            conn.execute(
+                """UPDATE jobs SET status = 'running', stage = 'claimed', started_at = ?,
+                   worker_id = ?, lease_expires = ? WHERE id = ?""",
+                (now, worker_id, now + LEASE_SECONDS, row['id'])
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO owners (owner, last_served) VALUES (?, ?)",
+                (row['owner'], now)
+            )
+            return dict(row)
+
+    def renew_leases(self, worker_id):
+        """Extend the leases on every job a live worker is still running."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE worker_id = ? AND status = 'running'",
+                (time.time() + LEASE_SECONDS, worker_id)
+            )
+
+    def update_stage(self, job_id, stage):
+        """Record the current processing stage of a running job."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET stage = ? WHERE id = ?", (stage, job_id))
+
+    def finish(self, job_id, status, elements=None, detail=None):
+        """
+        Record a job's outcome; detail holds an error or skip reason.
+
+        The spooled file is kept for failed jobs so they can be retried.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, elements = ?, detail = ?, finished_at = ? WHERE id = ?",
+                (status, elements, detail, time.time(), job_id)
+            )
+        if row is not None and status != 'error':
+            Path(row['path']).unlink(missing_ok=True)
+
+    def fail_running(self, job_ids, detail):
+        """Record jobs from a batch that broke off mid-way as failed, leaving finished ones alone."""
+        with self._connect() as conn:
+            conn.executemany(
+                """UPDATE jobs SET status = 'error', stage = NULL, detail = ?, finished_at = ?
+                   WHERE id = ? AND status = 'running'""",
+                [(detail, time.time(), job_id) for job_id in job_ids]
+            )
+
+    def release(self, job_id):
+        """Return a running job to the queue, e.g. when its worker is stopped."""
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'queued', stage = 'interrupted', worker_id = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'running'""",
+                (job_id,)
+            )
+
+    def cancel(self, job_id):
+        """Cancel a job that has not been claimed yet; it can be retried later."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again, resuming from its checkpoints."""
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'queued', stage = 'retry', detail = NULL, finished_at = NULL
+                   WHERE id = ? AND status IN (?, ?)""",
+                (job_id, *RETRYABLE_STATUSES)
+            )
+
+    def requeue_interrupted(self):
+        """
+        Queue again any running jobs whose worker stopped renewing their lease.
+
+        Returns:
+            Number of jobs requeued
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = 'queued', stage = 'resumed', worker_id = NULL, lease_expires = NULL
+                   WHERE status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)""",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def has_unfinished(self):
+        """Whether any job is still queued or was left running by a stopped worker."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", ACTIVE_STATUSES
+            ).fetchone()
+        return row is not None
+
+    def list_jobs(self, owner, limit=50):
+        """Return an owner's most recent jobs, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE owner = ? ORDER BY id DESC LIMIT ?",
+                (owner, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def start_worker(self, loader):
+        """
+        Start the background worker thread for this queue if none is running.
+
+        The first start also registers stop_worker to run at interpreter exit
+        through threading._register_atexit (CPython 3.9+). Plain atexit hooks
+        run too late: interpreter shutdown first runs the threading exit hooks,
+        and the one concurrent.futures registers joins the extraction pool,
+        waiting for every submitted document. threading hooks run in reverse
+        order of registration, and concurrent.futures registered its hook when
+        this module imported it, so stop_worker runs first and can stop the
+        batch or kill the workers before that join.
+
+        Args:
+            loader: ComponentLoader whose RAGSystem the worker writes through
+        """
+        # Every Streamlit session calls this on its script runs, possibly at the same time
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return self._worker
+
+            self._stop_event = threading.Event()
+            self._worker = threading.Thread(
+                target=run_worker,
+                args=(self, loader, self._stop_event),
+                name="ingest-worker",
+                daemon=True
+            )
+            self._worker.start()
+
+            if not self._exit_hook_registered:
+                threading._register_atexit(self.stop_worker, WORKER_STOP_TIMEOUT)
+                self._exit_hook_registered = True
+            return self._worker
+
+    def stop_worker(self, timeout=None):
+        """
+        Ask the worker to exit after its current batch and wait for it.
+
+        If the batch is still running after timeout seconds, the extraction
+        processes are killed; the interrupted jobs go back to the queue and
+        resume from their checkpoints on the next start.
+        """
+        with self._worker_lock:
+            if self._worker is None:
+                return
+            self._stop_event.set()
+            self._worker.join(timeout)
+            if self._worker.is_alive():
+                logger.warning("Ingestion worker did not stop in time, terminating extraction")
+                get_extraction_pool().terminate()
+                self._worker.join(timeout)
+            self._worker = None
+
+
+def process_batch(job_queue, pipeline, jobs, stop_event=None):
+    """
+    Ingest a batch of claimed jobs with distinct filenames and record their outcomes.
+
+    Jobs that fail because the worker is being stopped are returned to the queue.
+    """
+    jobs_by_name = {job['filename']: job for job in jobs}
+
+    def on_progress(event):
+        job_queue.update_stage(jobs_by_name[event['name']]['id'], event['event'])
+
+    # Jobs from different owners may use different extraction options
+    groups = {}
+    for job in jobs:
+        options = (bool(job['use_ocr']), bool(job['extract_tables']), bool(job['extract_charts']))
+        groups.setdefault(options, []).append(job)
+
+    for (use_ocr, extract_tables, extract_charts), group in groups.items():
+        try:
+            results = pipeline.run(
+                [(job['filename'], job['path']) for job in group],
+                use_ocr=use_ocr,
+                extract_tables=extract_tables,
+                extract_charts=extract_charts,
+                progress_callback=on_progress
+            )
+        except Exception as e:
+            logger.error(f"Ingestion batch failed: {e}")
+            for job in group:
+                if stop_event is not None and stop_event.is_set():
+                    job_queue.release(job['id'])
+                else:
+                    job_queue.finish(job['id'], 'error', detail=str(e))
+            continue
+
+        for result in results:
+            job_id = jobs_by_name[result['name']]['id']
+            if result['status'] == 'error' and stop_event is not None and stop_event.is_set():
+                job_queue.release(job_id)
+            elif result['status'] == 'error':
+                job_queue.finish(job_id, 'error', detail=result['error'])
+            elif result['status'] == 'skipped':
+                job_queue.finish(job_id, 'skipped', detail=result['reason'])
+            else:
+                job_queue.finish(job_id, 'done', elements=result['elements'])
+
+
+def run_worker(job_queue, loader, stop_event=None, poll_interval=1.0):
+    """Claim and ingest jobs until stop_event is set."""
+    try:
+        rag_system = loader.get_rag_system()
+    except Exception as e:
+        # The app starts the worker again on its next run while jobs are unfinished
+        logger.error(f"Ingestion worker could not load components: {e}")
+        return
+    # The extraction workers start on the first document that needs them, so
+    # text-only uploads never load the OCR models
+    pipeline = IngestionPipeline(rag_system)
+    batch_size = pipeline.pool.max_workers
+
+    # Jobs are leased to this run of the worker, not to a pid that may be reused after a restart
+    worker_id = uuid.uuid4().hex
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(LEASE_SECONDS / 4):
+            job_queue.renew_leases(worker_id)
+
+    threading.Thread(target=heartbeat, name="ingest-heartbeat", daemon=True).start()
+    logger.info(f"Ingestion worker {worker_id} ready")
+
+    carried = None
+    try:
+        while stop_event is None or not stop_event.is_set():
+            requeued = job_queue.requeue_interrupted()
+            if requeued:
+                logger.info(f"Resuming {requeued} interrupted jobs")
+
+            # Claim up to one job per extraction worker; a repeated filename or a
+            # copy of a claimed upload waits for the next batch, so the copy is
+            # checked against the registry once the original has finished
+            batch = [carried] if carried else []
+            carried = None
+            while len(batch) < batch_size:
+                job = job_queue.claim(worker_id)
+                if job is None:
+                    break
+                if any(
+                    claimed['filename'] == job['filename'] or claimed['content_hash'] == job['content_hash']
+                    for claimed in batch
+                ):
+                    carried = job
+                    break
+                batch.append(job)
+
+            if not batch:
+                time.sleep(poll_interval)
+                continue
+            try:
+                process_batch(job_queue, pipeline, batch, stop_event)
+            except Exception as e:
+                # Fail what is left of this batch and carry on with the next one
+                logger.error(f"Ingestion batch failed: {e}")
+                job_queue.fail_running([job['id'] for job in batch], str(e))
+
+        if carried:
+            job_queue.release(carried['id'])
+    finally:
+        # Leases must stop being renewed however the worker exits, or its jobs never requeue
+        stopped.set()
+        pipeline.pool.shutdown()
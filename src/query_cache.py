@@ -0,0 +1,68 @@
+"""
+Answer cache for RAGSystem.query.
+
+Answers are keyed on the normalized question, the retrieval settings, the LLM
+provider and the collection version from the document registry. Any change to
+the indexed documents, from this process or another, changes the version and
+so misses every older entry.
+"""
+
+import copy
+import re
+import threading
+
+from cachetools import LRUCache
+
+_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_question(question):
+    """Collapse case, whitespace and trailing punctuation."""
+    question = ' '.join(question.lower().split())
+    return _PUNCTUATION.sub('', question)
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results shared across sessions."""
+
+    def __init__(self, registry, maxsize=256):
+        self.registry = registry
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, question, similarity_threshold, top_k_results, llm_provider):
+        """Build the cache key for a question under the current settings."""
+        return (
+            normalize_question(question),
+            similarity_threshold,
+            top_k_results,
+            llm_provider,
+            self.registry.version()
+        )
+
+    def get(self, key):
+        """Return a copy of the cached result for a key, or None."""
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """Store a query result."""
+        with self._lock:
+            self._cache[key] = copy.deepcopy(result)
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._cache.clear()
+
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,171 @@
+"""
+Lightweight ingestion path for plain text and Markdown files.
+
+Text uploads do not need OCR, table detection or chart detection, so they are
+parsed here with the standard library only: the file is streamed line by line
+and split into paragraphs. Markdown files are also split into sections on
+headings, and their pipe tables are turned into table elements directly;
+fenced code blocks are kept verbatim. Nothing in this module imports the
+vision stack.
+"""
+
+import re
+from collections import Counter
+from pathlib import Path
+
+TEXT_EXTENSIONS = {'.txt', '.md'}
+
+# Text is always parsed in full, so it is recorded as ingested with every
+# extraction option (use_ocr, extract_tables, extract_charts) enabled
+TEXT_OPTIONS = (True, True, True)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+_FENCE = re.compile(r"^(```|~~~)")
+
+
+class TextElement:
+    """Extracted element with the same attributes as DocumentProcessor's elements."""
+
+    __slots__ = ('element_type', 'content', 'metadata')
+
+    def __init__(self, element_type, content, metadata=None):
+        self.element_type = element_type
+        self.content = content
+        self.metadata = metadata or {}
+
+    def __repr__(self):
+        return f"TextElement({self.element_type!r}, {self.content[:40]!r})"
+
+
+def is_text_document(path):
+    """Whether a file can use the text fast path."""
+    return Path(path).suffix.lower() in TEXT_EXTENSIONS
+
+
+def _split_row(line):
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+def iter_text_elements(lines, markdown=True):
+    """
+    Yield elements from an iterable of text lines.
+
+    Args:
+        lines: Iterable of lines, e.g. an open text file
+        markdown: Whether to parse headings, pipe tables and code fences;
+            plain text is only split into paragraphs
+
+    Yields:
+        TextElement objects in document order
+    """
+    section = None
+    paragraph = []
+    table = []
+    fence = None
+
+    def flush_paragraph():
+        if paragraph:
+            content = '\n'.join(paragraph).strip()
+            lines = [line for line in paragraph if line]
+            paragraph.clear()
+            # A heading on its own is carried by the next element's section instead
+            if content and not (markdown and len(lines) == 1 and _HEADING.match(lines[0])):
+                return TextElement('text', content, {'page': 1, 'section': section})
+        return None
+
+    def flush_table():
+        if not table:
+            return None
+        rows = [_split_row(line) for line in table if not _TABLE_SEPARATOR.match(line)]
+        table.clear()
+        if not rows:
+            return None
+        headers = rows[0]
+        content = '\n'.join(' | '.join(row) for row in rows)
+        return TextElement('table', content, {
+            'page': 1,
+            'section': section,
+            'headers': headers,
+            'rows': len(rows) - 1,
+            'columns': len(headers)
+        })
+
+    for raw_line in lines:
+        line = raw_line.strip()
+
+        if fence:
+            # Code is kept as written, including indentation and blank lines
+            paragraph.append(raw_line.rstrip())
+            if line.startswith(fence):
+                fence = None
+            continue
+
+        if not markdown:
+            if line:
+                paragraph.append(line)
+            elif paragraph and paragraph[-1]:
+                paragraph.append('')
+            continue
+
+        opening = _FENCE.match(line)
+        if opening:
+            element = flush_table()
+            if element:
+                yield element
+            fence = opening.group(1)
+            paragraph.append(line)
+            continue
+
+        if line.startswith('|'):
+            element = flush_paragraph()
+            if element:
+                yield element
+            table.append(line)
+            continue
+
+        element = flush_table()
+        if element:
+            yield element
+
+        heading = _HEADING.match(line)
+        if heading:
+            element = flush_paragraph()
+            if element:
+                yield element
+            section = heading.group(2)
+            paragraph.append(line)
+        elif line:
+            paragraph.append(line)
+        elif paragraph and paragraph[-1]:
+            # Keep paragraph breaks inside a section
+            paragraph.append('')
+
+    for element in (flush_table(), flush_paragraph()):
+        if element:
+            yield element
+
+
+def _build_document(elements, file_type):
+    return {
+        'elements': elements,
+        'metadata': {
+            'file_type': file_type,
+            'total_elements': len(elements),
+            'element_types': dict(Counter(element.element_type for element in elements))
+        }
+    }
+
+
+def process_text_document(path):
+    """
+    Parse a text or Markdown file into the document structure used by RAGSystem.
+
+    Returns:
+        Dict with 'elements' and 'metadata', like DocumentProcessor.process_document
+    """
+    file_type = Path(path).suffix.lower().lstrip('.')
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        elements = list(iter_text_elements(f, markdown=file_type == 'md'))
+    return _build_document(elements, file_type)
+
@@ -0,0 +1,76 @@
+"""
+Shared fakes for the ingestion tests.
+
+The real DocumentProcessor and RAGSystem are not needed: the pipeline only
+relies on elements having element_type, content and metadata, and on
+RAGSystem.add_document.
+"""
+
+from concurrent.futures import Future
+
+import pytest
+
+from src.document_registry import DocumentRegistry
+from src.extraction_cache import ExtractionCache
+
+
+class FakeElement:
+    def __init__(self, element_type, content, page=1):
+        self.element_type = element_type
+        self.content = content
+        self.metadata = {'page': page}
+
+
+class FakeRAGSystem:
+    def __init__(self):
+        self.documents = []
+
+    def add_document(self, doc_data, filename):
+        self.documents.append((filename, [element.content for element in doc_data['elements']]))
+
+
+class FakePool:
+    """Runs nothing; records submissions and returns results from a callback."""
+
+    max_workers = 2
+
+    def __init__(self, result_for=None):
+        self.calls = []
+        self.result_for = result_for
+
+    def submit(self, fn, *args):
+        self.calls.append((fn.__name__, args))
+        future = Future()
+        try:
+            future.set_result(self.result_for(fn.__name__, args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def record_worker(self, status):
+        pass
+
+
+def shard_result(first_page, last_page):
+    """Extraction result for a page range with one element per page."""
+    elements = [FakeElement('text', f"page {page}", page) for page in range(first_page + 1, last_page + 1)]
+    return {
+        'elements': elements,
+        'metadata': {
+            'total_pages': last_page - first_page,
+            'file_path': f"/tmp/shard-{first_page}.pdf",
+            'file_type': 'pdf',
+            'total_elements': len(elements),
+            'element_types': {'text': len(elements)},
+        }
+    }
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return DocumentRegistry(tmp_path / "registry.sqlite3")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(tmp_path / "cache", max_bytes=10 * 1024 * 1024)
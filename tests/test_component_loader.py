@@ -0,0 +1,112 @@
+import sys
+import types
+
+import pytest
+
+import src.component_loader as component_loader
+from src.component_loader import ComponentLoader
+
+
+class FakeRAGSystem:
+    def __init__(self, config, doc_processor):
+        self.config = config
+        self.doc_processor = doc_processor
+
+
+class FakeDocumentProcessor:
+    def __init__(self, config):
+        self.config = config
+
+    def process_document(self, path):
+        return {'elements': [], 'metadata': {'file_path': path}}
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    """Replace the model-backed modules with fakes and record how often they are built."""
+    built = []
+
+    def module(name, **attributes):
+        fake = types.ModuleType(name)
+        fake.__dict__.update(attributes)
+        monkeypatch.setitem(sys.modules, name, fake)
+        return fake
+
+    def recording(cls):
+        def build(*args):
+            built.append(cls.__name__)
+            return cls(*args)
+        return build
+
+    monkeypatch.setattr(component_loader, 'HEAVY_MODULES', ())
+    monkeypatch.setattr(component_loader, 'VISION_MODULES', ())
+    rag_module = module('src.rag_system', RAGSystem=recording(FakeRAGSystem))
+    module('src.document_processor', DocumentProcessor=recording(FakeDocumentProcessor))
+    return types.SimpleNamespace(built=built, rag_module=rag_module)
+
+
+def test_rag_system_is_loaded_once_on_first_use(modules):
+    loader = ComponentLoader("config")
+    assert not loader.is_ready()
+    assert modules.built == []
+
+    rag = loader.get_rag_system()
+
+    assert loader.get_rag_system() is rag
+    assert loader.is_ready()
+    assert modules.built == ['FakeRAGSystem']
+    assert 'RAG system' in loader.load_times
+
+
+def test_document_processor_is_built_only_when_used(modules):
+    loader = ComponentLoader("config")
+    rag = loader.get_rag_system()
+    assert 'FakeDocumentProcessor' not in modules.built
+
+    result = rag.doc_processor.process_document("a.pdf")
+
+    assert result['metadata']['file_path'] == "a.pdf"
+    assert modules.built == ['FakeRAGSystem', 'FakeDocumentProcessor']
+    assert 'Document processor' in loader.load_times
+
+
+def test_failed_preload_is_recorded_and_cleared_by_a_retry(modules, monkeypatch):
+    def broken(config, doc_processor):
+        raise RuntimeError("model download failed")
+
+    monkeypatch.setattr(modules.rag_module, 'RAGSystem', broken)
+    loader = ComponentLoader("config")
+
+    loader.preload().join()
+
+    assert str(loader.error) == "model download failed"
+    assert not loader.is_ready()
+    assert not loader.is_loading()
+
+    monkeypatch.setattr(modules.rag_module, 'RAGSystem', FakeRAGSystem)
+    loader.get_rag_system()
+
+    assert loader.error is None
+    assert loader.is_ready()
+
+
+def test_failed_load_is_recorded_for_background_callers(modules, monkeypatch):
+    def broken(config, doc_processor):
+        raise RuntimeError("out of memory")
+
+    monkeypatch.setattr(modules.rag_module, 'RAGSystem', broken)
+    loader = ComponentLoader("config")
+
+    with pytest.raises(RuntimeError):
+        loader.get_rag_system()
+
+    assert str(loader.error) == "out of memory"
+
+
+def test_missing_optional_module_is_skipped():
+    loader = ComponentLoader("config")
+
+    assert loader._import('no_such_module_for_tests', required=False) is None
+    assert 'no_such_module_for_tests' not in loader.import_times
+    with pytest.raises(ImportError):
+        loader._import('no_such_module_for_tests')
@@ -0,0 +1,76 @@
+from src.document_registry import DocumentRegistry
+
+from conftest import FakeElement
+
+
+def test_filter_new_elements_skips_indexed_and_repeated_content(registry):
+    first = [FakeElement('text', "Revenue grew"), FakeElement('table', "a | b")]
+    new = registry.filter_new_elements(first)
+    registry.add_document("doc-1", "report.pdf", [digest for digest, _ in new])
+
+    second = [
+        FakeElement('text', "Revenue   grew"),
+        FakeElement('text', "Costs fell"),
+        FakeElement('text', "Costs fell"),
+    ]
+    remaining = registry.filter_new_elements(second)
+
+    assert [element.content for _, element in remaining] == ["Costs fell"]
+
+
+def test_same_content_with_different_type_is_new(registry):
+    new = registry.filter_new_elements([FakeElement('text', "a | b")])
+    registry.add_document("doc-1", "notes.md", [digest for digest, _ in new])
+
+    assert len(registry.filter_new_elements([FakeElement('table', "a | b")])) == 1
+
+
+def test_get_document(registry):
+    assert registry.get_document("doc-1") is None
+
+    registry.add_document("doc-1", "report.pdf", ["h1", "h2"])
+
+    record = registry.get_document("doc-1")
+    assert record['filename'] == "report.pdf"
+    assert record['elements'] == 2
+
+
+def test_find_document_requires_the_requested_options(registry):
+    registry.add_document("doc-1", "scan.png", ["h1"], use_ocr=False)
+
+    assert registry.find_document("doc-1", use_ocr=False)['filename'] == "scan.png"
+    assert registry.find_document("doc-1", use_ocr=False, extract_tables=False)['filename'] == "scan.png"
+    assert registry.find_document("doc-1") is None
+
+
+def test_reingesting_widens_options_and_adds_elements(registry):
+    registry.add_document("doc-1", "scan.png", ["h1"], use_ocr=False, extract_charts=False)
+
+    registry.add_document("doc-1", "scan-again.png", ["h2", "h3"], extract_charts=False)
+
+    record = registry.get_document("doc-1")
+    assert record['filename'] == "scan.png"
+    assert record['elements'] == 3
+    assert (record['use_ocr'], record['extract_tables'], record['extract_charts']) == (True, True, False)
+
+
+def test_version_changes_only_when_content_is_added_or_cleared(registry):
+    start = registry.version()
+
+    registry.add_document("doc-1", "empty.pdf", [])
+    assert registry.version() == start
+
+    registry.add_document("doc-2", "report.pdf", ["h1"])
+    assert registry.version() == start + 1
+
+    registry.clear()
+    assert registry.version() == start + 2
+    assert registry.get_document("doc-2") is None
+
+
+def test_version_is_shared_between_instances(registry, tmp_path):
+    other = DocumentRegistry(tmp_path / "registry.sqlite3")
+
+    other.add_document("doc-1", "report.pdf", ["h1"])
+
+    assert registry.version() == other.version()
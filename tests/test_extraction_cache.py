@@ -0,0 +1,100 @@
+import os
+import pickle
+
+import src.extraction_cache as extraction_cache
+from src.extraction_cache import ExtractionCache
+
+
+def test_round_trip_and_miss(cache):
+    key = cache.make_key("abc", True, True, False)
+
+    assert cache.get(key) is None
+    cache.put(key, {'elements': [], 'metadata': {'pages': 3}})
+    assert cache.get(key) == {'elements': [], 'metadata': {'pages': 3}}
+
+
+def test_key_depends_on_content_and_options(cache):
+    key = cache.make_key("abc", True, True, True)
+
+    assert key == cache.make_key("abc", True, True, True)
+    assert key != cache.make_key("abd", True, True, True)
+    assert key != cache.make_key("abc", False, True, True)
+    assert cache.shard_key(key, 0, 25) != cache.shard_key(key, 25, 50)
+
+
+def test_delete(cache):
+    key = cache.make_key("abc", True, True, True)
+    cache.put(key, {'elements': []})
+
+    cache.delete(key)
+    cache.delete(key)
+
+    assert cache.get(key) is None
+
+
+def test_unreadable_entry_is_discarded(cache):
+    key = cache.make_key("abc", True, True, True)
+    cache.put(key, {'elements': []})
+    path = cache._entry_path(key)
+    path.write_bytes(b"not a pickle")
+
+    assert cache.get(key) is None
+    assert not path.exists()
+
+
+def test_get_tolerates_eviction_after_reading(cache, monkeypatch):
+    key = cache.make_key("abc", True, True, True)
+    cache.put(key, {'elements': ["a"]})
+    load = pickle.load
+
+    def load_then_evict(f):
+        doc_data = load(f)
+        os.unlink(f.name)
+        return doc_data
+
+    monkeypatch.setattr(extraction_cache.pickle, 'load', load_then_evict)
+
+    assert cache.get(key) == {'elements': ["a"]}
+
+
+def test_put_tolerates_eviction_after_writing(cache, monkeypatch):
+    replace = os.replace
+
+    def replace_then_evict(src, dst):
+        replace(src, dst)
+        os.unlink(dst)
+
+    cache.evict()
+    monkeypatch.setattr(extraction_cache.os, 'replace', replace_then_evict)
+
+    cache.put(cache.make_key("abc", True, True, True), {'elements': ["a"]})
+
+    assert cache._size == 0
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    entry = b"x" * 10_000
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=35_000)
+    keys = [cache.make_key(str(index), True, True, True) for index in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, entry)
+        # Distinct modification times, oldest first
+        timestamp = 1_000_000 + age
+        os.utime(cache._entry_path(key), (timestamp, timestamp))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) == entry
+    cache.put(cache.make_key("3", True, True, True), entry)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == entry
+    assert cache.get(keys[2]) == entry
+
+
+def test_stays_within_budget_across_many_writes(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=50_000)
+    for index in range(40):
+        cache.put(cache.make_key(str(index), True, True, True), b"x" * 5_000)
+
+    total = sum(path.stat().st_size for path in (tmp_path / "cache").glob('*/*.pkl'))
+    assert total <= cache.max_bytes
@@ -0,0 +1,135 @@
+import json
+import sys
+import types
+
+import pytest
+
+import src.component_loader as component_loader
+import src.ingest as ingest
+from src.ingest import find_documents, format_duration, main
+
+
+class FakeLoader:
+    def __init__(self, config):
+        pass
+
+    def get_rag_system(self):
+        return "rag"
+
+
+class FakePool:
+    max_workers = 2
+
+    def __init__(self):
+        self.warmed = False
+        self.shut_down = False
+
+    def warm_up(self):
+        self.warmed = True
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+class FakePipeline:
+    """Succeeds for every file except those whose name contains 'bad'."""
+
+    instances = []
+
+    def __init__(self, rag_system, max_workers=None):
+        self.pool = FakePool()
+        self.batches = []
+        FakePipeline.instances.append(self)
+
+    def run(self, files, use_ocr=True, extract_tables=True, extract_charts=True, progress_callback=None):
+        self.batches.append(([name for name, _ in files], (use_ocr, extract_tables, extract_charts)))
+        results = []
+        for name, _ in files:
+            if 'bad' in name:
+                result = {'name': name, 'status': 'error', 'error': "unreadable"}
+                progress_callback({'event': 'error', 'name': name})
+            else:
+                result = {'name': name, 'status': 'success', 'elements': 1}
+                progress_callback({'event': 'completed', 'name': name})
+            results.append(result)
+        return results
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    FakePipeline.instances = []
+    monkeypatch.setitem(sys.modules, 'src.config', types.SimpleNamespace(Config=lambda: "config"))
+    monkeypatch.setattr(component_loader, 'ComponentLoader', FakeLoader)
+    monkeypatch.setattr(ingest, 'IngestionPipeline', FakePipeline)
+    return FakePipeline.instances
+
+
+def make_tree(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"content")
+    return root
+
+
+def read_report(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_find_documents_filters_and_sorts(tmp_path):
+    make_tree(tmp_path, ["b.pdf", "a/c.PNG", "a/notes.md", "skip.exe", "a/readme"])
+
+    found = [path.relative_to(tmp_path).as_posix() for path in find_documents(tmp_path)]
+
+    assert found == ["a/c.PNG", "a/notes.md", "b.pdf"]
+
+
+def test_format_duration():
+    assert format_duration(0) == "0:00:00"
+    assert format_duration(61.9) == "0:01:01"
+    assert format_duration(3 * 3600 + 5) == "3:00:05"
+
+
+def test_missing_directory_exits_with_1(tmp_path, pipeline):
+    assert main([str(tmp_path / "missing")]) == 1
+    assert pipeline == []
+
+
+def test_empty_directory_exits_with_0_without_loading_models(tmp_path, pipeline):
+    make_tree(tmp_path, ["skip.exe"])
+
+    assert main([str(tmp_path), "--report", str(tmp_path / "report.jsonl")]) == 0
+    assert pipeline == []
+
+
+def test_report_has_one_line_per_file(tmp_path, pipeline):
+    root = make_tree(tmp_path / "docs", ["a.pdf", "sub/b.md", "c.png"])
+    report = tmp_path / "report.jsonl"
+
+    code = main([str(root), "--report", str(report), "--batch-size", "2", "--no-ocr"])
+
+    assert code == 0
+    lines = read_report(report)
+    assert [line['name'] for line in lines] == ["a.pdf", "c.png", "sub/b.md"]
+    assert lines[0] == {'path': str(root / "a.pdf"), 'name': "a.pdf", 'status': 'success', 'elements': 1}
+    batches = pipeline[0].batches
+    assert [names for names, _ in batches] == [["a.pdf", "c.png"], ["sub/b.md"]]
+    assert all(options == (False, True, True) for _, options in batches)
+    assert pipeline[0].pool.warmed
+    assert pipeline[0].pool.shut_down
+
+
+def test_errors_exit_with_2(tmp_path, pipeline):
+    root = make_tree(tmp_path / "docs", ["good.pdf", "bad.pdf"])
+    report = tmp_path / "report.jsonl"
+
+    assert main([str(root), "--report", str(report)]) == 2
+    assert {line['name']: line['status'] for line in read_report(report)} == {"bad.pdf": 'error', "good.pdf": 'success'}
+
+
+def test_text_only_tree_does_not_start_extraction_workers(tmp_path, pipeline):
+    root = make_tree(tmp_path / "docs", ["a.md", "b.txt"])
+
+    assert main([str(root), "--report", str(tmp_path / "report.jsonl")]) == 0
+    assert not pipeline[0].pool.warmed
@@ -0,0 +1,236 @@
+import sys
+import types
+
+import pytest
+
+import src.ingestion as ingestion
+from src.extraction_cache import sha256_file
+from src.ingestion import IngestionPipeline, assign_element_ids, merge_shards
+
+from conftest import FakeElement, FakePool, FakeRAGSystem, shard_result
+
+RANGES = [(0, 3), (3, 6), (6, 7)]
+
+
+@pytest.fixture
+def sharded(monkeypatch):
+    """Treat every PDF as a 7-page document split into three ranges."""
+    monkeypatch.setattr(ingestion, 'page_ranges', lambda path, shard_pages: RANGES)
+
+
+def extract(fn_name, args):
+    if fn_name == '_extract_page_range':
+        return shard_result(args[1], args[2]), 0.1, (1, 0.5)
+    return shard_result(0, 1), 0.1, (1, 0.5)
+
+
+def make_pipeline(registry, cache, pool=None):
+    return IngestionPipeline(FakeRAGSystem(), cache=cache, registry=registry, pool=pool or FakePool(extract))
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path
+
+
+def test_merge_shards_recomputes_document_metadata():
+    parts = [shard_result(first, last) for first, last in RANGES]
+
+    merged = merge_shards(parts, 7)
+
+    assert [element.metadata['page'] for element in merged['elements']] == list(range(1, 8))
+    assert merged['metadata']['total_pages'] == 7
+    assert merged['metadata']['total_elements'] == 7
+    assert merged['metadata']['element_types'] == {'text': 7}
+    assert merged['metadata']['file_type'] == 'pdf'
+    assert merged['metadata']['shards'] == 3
+    assert 'file_path' not in merged['metadata']
+
+
+def test_element_ids_are_numbered_per_page():
+    elements = [FakeElement('text', "a", 1), FakeElement('table', "b", 1), FakeElement('text', "c", 2)]
+
+    assign_element_ids(elements, "hash")
+
+    assert [element.metadata['element_id'] for element in elements] == ["hash:1:0", "hash:1:1", "hash:2:0"]
+
+
+def test_every_stored_document_gets_element_ids(tmp_path, registry, cache, monkeypatch):
+    monkeypatch.setattr(ingestion, 'page_ranges', lambda path, shard_pages: RANGES if path.suffix == '.pdf' else None)
+    results = {
+        name: {'elements': [FakeElement('text', f"{name} body")], 'metadata': {}}
+        for name in ["small.png", "cached.png"]
+    }
+
+    def extract_by_name(fn_name, args):
+        if fn_name == '_extract_page_range':
+            return extract(fn_name, args)
+        return results[args[0].rsplit('/', 1)[-1]], 0.1, (1, 0.5)
+
+    pipeline = make_pipeline(registry, cache, FakePool(extract_by_name))
+    paths = {name: write(tmp_path, name, name.encode()) for name in ["small.png", "cached.png", "book.pdf", "notes.md"]}
+    cache.put(cache.make_key(sha256_file(paths["cached.png"]), True, True, True), results["cached.png"])
+    stored = []
+    pipeline.rag_system.add_document = lambda doc_data, filename: stored.append((filename, doc_data['elements']))
+
+    pipeline.run(list(paths.items()))
+
+    assert {name for name, _ in stored} == set(paths)
+    for name, elements in stored:
+        content_hash = sha256_file(paths[name])
+        assert all(element.metadata['element_id'].startswith(f"{content_hash}:") for element in elements)
+
+
+def test_text_files_skip_the_extraction_pool(tmp_path, registry, cache):
+    pool = FakePool(extract)
+    pipeline = make_pipeline(registry, cache, pool)
+    path = write(tmp_path, "notes.md", b"# Title\n\nBody text\n")
+
+    results = pipeline.run([("notes.md", path)])
+
+    assert results[0]['status'] == 'success'
+    assert pool.calls == []
+    assert pipeline.rag_system.documents == [("notes.md", ["# Title\n\nBody text"])]
+
+
+def test_duplicates_are_skipped_by_content(tmp_path, registry, cache):
+    pipeline = make_pipeline(registry, cache)
+    first = write(tmp_path, "a.md", b"same content\n")
+    copy = write(tmp_path, "b.md", b"same content\n")
+
+    results = pipeline.run([("a.md", first), ("b.md", copy)])
+    again = pipeline.run([("c.md", first)])
+
+    assert [result['status'] for result in results] == ['success', 'skipped']
+    assert again[0] == {'name': "c.md", 'reason': "duplicate of a.md", 'status': 'skipped'}
+    assert len(pipeline.rag_system.documents) == 1
+
+
+def test_upload_with_more_extraction_is_not_a_duplicate(tmp_path, registry, cache):
+    def ocr_only(fn_name, args):
+        use_ocr = args[2]
+        return shard_result(0, 1 if use_ocr else 0), 0.1, (1, 0.5)
+
+    pipeline = make_pipeline(registry, cache, FakePool(ocr_only))
+    path = write(tmp_path, "scan.png", b"image bytes")
+
+    without_ocr = pipeline.run([("scan.png", path)], use_ocr=False)
+    with_ocr = pipeline.run([("scan.png", path)])
+    again = pipeline.run([("copy.png", path)], use_ocr=False)
+
+    assert without_ocr[0] == {'name': "scan.png", 'reason': "no content was extracted", 'status': 'skipped'}
+    assert with_ocr[0]['status'] == 'success'
+    assert again[0]['reason'] == "duplicate of scan.png"
+
+
+def test_fully_indexed_content_is_not_registered(tmp_path, registry, cache):
+    pipeline = make_pipeline(registry, cache)
+    first = write(tmp_path, "a.md", b"same paragraph\n")
+    other = write(tmp_path, "b.md", b"same paragraph\n\n\n")
+
+    pipeline.run([("a.md", first)])
+    results = pipeline.run([("b.md", other)])
+
+    assert results[0]['reason'] == "all extracted content is already indexed"
+    assert registry.get_document(sha256_file(other)) is None
+
+
+def test_cached_extraction_is_not_submitted(tmp_path, registry, cache):
+    pool = FakePool(extract)
+    pipeline = make_pipeline(registry, cache, pool)
+    path = write(tmp_path, "scan.png", b"image bytes")
+    cache.put(cache.make_key(sha256_file(path), True, True, True), shard_result(0, 1))
+
+    results = pipeline.run([("scan.png", path)])
+
+    assert results[0]['cached'] is True
+    assert pool.calls == []
+
+
+def test_resume_extracts_only_missing_shards(tmp_path, registry, cache, sharded):
+    pool = FakePool(extract)
+    pipeline = make_pipeline(registry, cache, pool)
+    path = write(tmp_path, "book.pdf", b"pdf bytes")
+    cache_key = cache.make_key(sha256_file(path), True, True, True)
+    cache.put(cache.shard_key(cache_key, 3, 6), shard_result(3, 6))
+    events = []
+
+    results = pipeline.run([("book.pdf", path)], progress_callback=events.append)
+
+    submitted = [args[1:3] for _, args in pool.calls]
+    assert submitted == [(0, 3), (6, 7)]
+    assert results[0]['status'] == 'success'
+    assert results[0]['elements'] == 7
+    assert any(event['event'] == 'resumed' and event['shards'] == 1 for event in events)
+
+
+def test_checkpoints_are_deleted_after_merge(tmp_path, registry, cache, sharded):
+    path = write(tmp_path, "book.pdf", b"pdf bytes")
+    cache_key = cache.make_key(sha256_file(path), True, True, True)
+    for first, last in RANGES:
+        cache.put(cache.shard_key(cache_key, first, last), shard_result(first, last))
+    pool = FakePool(extract)
+
+    results = make_pipeline(registry, cache, pool).run([("book.pdf", path)])
+
+    assert pool.calls == []
+    assert results[0]['status'] == 'success'
+    assert cache.get(cache_key)['metadata']['total_pages'] == 7
+    assert all(cache.get(cache.shard_key(cache_key, first, last)) is None for first, last in RANGES)
+
+
+def test_submit_failure_only_fails_that_document(tmp_path, registry, cache, sharded):
+    def flaky(fn_name, args):
+        if args[0].endswith("broken.pdf"):
+            raise RuntimeError("worker crashed")
+        return extract(fn_name, args)
+
+    pipeline = make_pipeline(registry, cache, FakePool(flaky))
+    broken = write(tmp_path, "broken.pdf", b"broken")
+    good = write(tmp_path, "good.pdf", b"good")
+
+    results = {result['name']: result for result in pipeline.run([("broken.pdf", broken), ("good.pdf", good)])}
+
+    assert results["broken.pdf"]['status'] == 'error'
+    assert "worker crashed" in results["broken.pdf"]['error']
+    assert results["good.pdf"]['status'] == 'success'
+    assert registry.get_document(sha256_file(broken)) is None
+
+
+def test_worker_load_failure_is_reported_per_document(tmp_path, cache, monkeypatch):
+    class BrokenProcessor:
+        def __init__(self, config):
+            raise RuntimeError("CUDA unavailable")
+
+    class WorkingProcessor:
+        def __init__(self, config):
+            pass
+
+        def process_document(self, path, **options):
+            return shard_result(0, 1)
+
+    processor_module = types.SimpleNamespace(DocumentProcessor=BrokenProcessor)
+    monkeypatch.setitem(sys.modules, 'src.config', types.SimpleNamespace(Config=lambda: "config"))
+    monkeypatch.setitem(sys.modules, 'src.document_processor', processor_module)
+    monkeypatch.setattr(ingestion, '_worker_processor', None)
+    monkeypatch.setattr(ingestion, '_worker_cache', cache)
+    monkeypatch.setattr(ingestion, '_worker_load_time', None)
+    path = str(write(tmp_path, "scan.png", b"image bytes"))
+
+    ingestion._init_worker()
+    with pytest.raises(RuntimeError, match="CUDA unavailable"):
+        ingestion._extract_document(path, "key", True, True, True)
+
+    processor_module.DocumentProcessor = WorkingProcessor
+    doc_data, _, _ = ingestion._extract_document(path, "key", True, True, True)
+    assert len(doc_data['elements']) == 1
+
+
+def test_terminated_pool_refuses_new_work():
+    pool = ingestion.ExtractionPool(max_workers=1)
+
+    pool.terminate()
+
+    with pytest.raises(RuntimeError):
+        pool.submit(ingestion._worker_status)
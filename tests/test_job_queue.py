@@ -0,0 +1,324 @@
+import threading
+import time
+
+import pytest
+
+import src.job_queue as job_queue_module
+from src.job_queue import JobQueue, process_batch, run_worker
+
+
+@pytest.fixture
+def queue(tmp_path, registry):
+    return JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", registry=registry)
+
+
+def statuses(queue, owner):
+    return {job['filename']: job['status'] for job in queue.list_jobs(owner)}
+
+
+def test_claim_alternates_between_owners(queue):
+    for index in range(3):
+        queue.enqueue("alice", f"a{index}.pdf", f"alice {index}".encode())
+    queue.enqueue("bob", "b0.pdf", b"bob 0")
+
+    claimed = [queue.claim("worker")['filename'] for _ in range(4)]
+
+    assert claimed[:2] in (["a0.pdf", "b0.pdf"], ["b0.pdf", "a0.pdf"])
+    assert claimed[2:] == ["a1.pdf", "a2.pdf"]
+    assert queue.claim("worker") is None
+
+
+def test_enqueue_spools_the_upload(queue):
+    job_id = queue.enqueue("alice", "scan.png", b"image bytes")
+
+    job = queue.claim("worker")
+    assert job['id'] == job_id
+    with open(job['path'], 'rb') as f:
+        assert f.read() == b"image bytes"
+
+
+def test_enqueue_skips_indexed_content_without_spooling(queue, registry, tmp_path):
+    registry.add_document(job_queue_module.sha256_buffer(b"indexed"), "old.pdf", ["h1"])
+    queue.enqueue("alice", "again.pdf", b"indexed")
+    queue.enqueue("alice", "new.pdf", b"fresh")
+
+    jobs = {job['filename']: job for job in queue.list_jobs("alice")}
+    assert jobs["again.pdf"]['status'] == 'skipped'
+    assert jobs["again.pdf"]['detail'] == "duplicate of old.pdf"
+    assert len(list((tmp_path / "spool").iterdir())) == 1
+
+
+def test_copy_of_an_unfinished_job_is_queued(queue, tmp_path):
+    queue.enqueue("alice", "new.pdf", b"fresh")
+    queue.enqueue("bob", "copy.pdf", b"fresh")
+
+    assert statuses(queue, "bob") == {"copy.pdf": 'queued'}
+    assert len(list((tmp_path / "spool").iterdir())) == 2
+
+
+def test_enqueue_requeues_content_indexed_with_fewer_options(queue, registry):
+    content_hash = job_queue_module.sha256_buffer(b"scan")
+    registry.add_document(content_hash, "scan.png", ["h1"], use_ocr=False)
+
+    queue.enqueue("alice", "no-ocr.png", b"scan", use_ocr=False)
+    queue.enqueue("alice", "ocr.png", b"scan")
+
+    assert statuses(queue, "alice") == {"no-ocr.png": 'skipped', "ocr.png": 'queued'}
+
+
+def test_cancel_and_retry(queue):
+    job_id = queue.enqueue("alice", "a.pdf", b"a")
+
+    queue.cancel(job_id)
+    assert statuses(queue, "alice") == {"a.pdf": 'cancelled'}
+    assert queue.claim("worker") is None
+
+    queue.retry(job_id)
+    assert queue.claim("worker")['id'] == job_id
+
+
+def test_cancel_ignores_running_jobs(queue):
+    job_id = queue.enqueue("alice", "a.pdf", b"a")
+    queue.claim("worker")
+
+    queue.cancel(job_id)
+
+    assert statuses(queue, "alice") == {"a.pdf": 'running'}
+
+
+def test_failed_job_keeps_its_spool_file_for_retry(queue):
+    job_id = queue.enqueue("alice", "a.pdf", b"a")
+    path = queue.claim("worker")['path']
+
+    queue.finish(job_id, 'error', detail="boom")
+    queue.retry(job_id)
+
+    assert queue.claim("worker")['path'] == path
+
+
+def test_requeue_only_expired_leases(queue, monkeypatch):
+    queue.enqueue("alice", "live.pdf", b"live")
+    queue.claim("live-worker")
+    assert queue.requeue_interrupted() == 0
+
+    monkeypatch.setattr(job_queue_module, 'LEASE_SECONDS', -1)
+    queue.enqueue("alice", "dead.pdf", b"dead")
+    queue.claim("dead-worker")
+
+    assert queue.requeue_interrupted() == 1
+    assert statuses(queue, "alice") == {"live.pdf": 'running', "dead.pdf": 'queued'}
+
+
+def test_renewed_lease_is_not_requeued(queue, monkeypatch):
+    monkeypatch.setattr(job_queue_module, 'LEASE_SECONDS', -1)
+    queue.enqueue("alice", "a.pdf", b"a")
+    queue.claim("worker")
+
+    monkeypatch.setattr(job_queue_module, 'LEASE_SECONDS', 120)
+    queue.renew_leases("worker")
+
+    assert queue.requeue_interrupted() == 0
+
+
+def test_release_returns_running_job_to_queue(queue):
+    job_id = queue.enqueue("alice", "a.pdf", b"a")
+    queue.claim("worker")
+
+    queue.release(job_id)
+
+    assert queue.claim("other-worker")['id'] == job_id
+
+
+def test_has_unfinished(queue):
+    assert not queue.has_unfinished()
+
+    job_id = queue.enqueue("alice", "a.pdf", b"a")
+    assert queue.has_unfinished()
+
+    queue.claim("worker")
+    queue.finish(job_id, 'done', elements=3)
+    assert not queue.has_unfinished()
+
+
+class FakePipeline:
+    def __init__(self, outcomes, error=None):
+        self.outcomes = outcomes
+        self.error = error
+        self.calls = []
+
+    def run(self, files, use_ocr=True, extract_tables=True, extract_charts=True, progress_callback=None):
+        self.calls.append(([name for name, _ in files], (use_ocr, extract_tables, extract_charts)))
+        if self.error:
+            raise self.error
+        for name, _ in files:
+            progress_callback({'event': 'extracted', 'name': name})
+        return [{'name': name, **self.outcomes[name]} for name, _ in files]
+
+
+def claim_all(queue):
+    jobs = []
+    while (job := queue.claim("worker")) is not None:
+        jobs.append(job)
+    return jobs
+
+
+def test_process_batch_records_outcomes(queue):
+    queue.enqueue("alice", "done.pdf", b"1")
+    queue.enqueue("alice", "skip.pdf", b"2")
+    queue.enqueue("alice", "fail.pdf", b"3", use_ocr=False)
+    pipeline = FakePipeline({
+        "done.pdf": {'status': 'success', 'elements': 4},
+        "skip.pdf": {'status': 'skipped', 'reason': "duplicate of x.pdf"},
+        "fail.pdf": {'status': 'error', 'error': "boom"},
+    })
+
+    process_batch(queue, pipeline, claim_all(queue))
+
+    jobs = {job['filename']: job for job in queue.list_jobs("alice")}
+    assert (jobs["done.pdf"]['status'], jobs["done.pdf"]['elements']) == ('done', 4)
+    assert (jobs["skip.pdf"]['status'], jobs["skip.pdf"]['detail']) == ('skipped', "duplicate of x.pdf")
+    assert (jobs["fail.pdf"]['status'], jobs["fail.pdf"]['detail']) == ('error', "boom")
+    # Jobs with different extraction options run as separate groups
+    assert sorted(options for _, options in pipeline.calls) == [(False, True, True), (True, True, True)]
+
+
+def test_process_batch_marks_group_failed_when_pipeline_raises(queue):
+    queue.enqueue("alice", "a.pdf", b"1")
+    queue.enqueue("alice", "b.pdf", b"2")
+
+    process_batch(queue, FakePipeline({}, error=RuntimeError("registry locked")), claim_all(queue))
+
+    assert statuses(queue, "alice") == {"a.pdf": 'error', "b.pdf": 'error'}
+
+
+def test_process_batch_releases_failures_when_stopping(queue):
+    queue.enqueue("alice", "a.pdf", b"1")
+    queue.enqueue("alice", "b.pdf", b"2")
+    pipeline = FakePipeline({
+        "a.pdf": {'status': 'success', 'elements': 1},
+        "b.pdf": {'status': 'error', 'error': "pool terminated"},
+    })
+
+    class Stopped:
+        def is_set(self):
+            return True
+
+    process_batch(queue, pipeline, claim_all(queue), Stopped())
+
+    assert statuses(queue, "alice") == {"a.pdf": 'done', "b.pdf": 'queued'}
+
+
+class FakeLoader:
+    def get_rag_system(self):
+        return "rag"
+
+
+class WorkerPool:
+    max_workers = 1
+
+    def __init__(self):
+        self.shut_down = False
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+def heartbeat_running():
+    return any(thread.name == "ingest-heartbeat" and thread.is_alive() for thread in threading.enumerate())
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def worker_pipeline(monkeypatch):
+    pipeline = FakePipeline({
+        "a.pdf": {'status': 'success', 'elements': 1},
+        "b.pdf": {'status': 'success', 'elements': 2},
+    })
+    pipeline.pool = WorkerPool()
+    monkeypatch.setattr(job_queue_module, 'IngestionPipeline', lambda rag_system: pipeline)
+    return pipeline
+
+
+def test_worker_survives_a_failed_batch(queue, worker_pipeline, monkeypatch):
+    queue.enqueue("alice", "a.pdf", b"1")
+    queue.enqueue("alice", "b.pdf", b"2")
+    batches = []
+
+    def first_batch_fails(job_queue, pipeline, jobs, stop_event=None):
+        batches.append(jobs)
+        if len(batches) == 1:
+            raise RuntimeError("database is locked")
+        process_batch(job_queue, pipeline, jobs, stop_event)
+
+    monkeypatch.setattr(job_queue_module, 'process_batch', first_batch_fails)
+    stop = threading.Event()
+    worker = threading.Thread(target=run_worker, args=(queue, FakeLoader(), stop, 0.01))
+    worker.start()
+
+    wait_for(lambda: not queue.has_unfinished())
+    stop.set()
+    worker.join(5)
+
+    jobs = {job['filename']: job for job in queue.list_jobs("alice")}
+    assert (jobs["a.pdf"]['status'], jobs["a.pdf"]['detail']) == ('error', "database is locked")
+    assert jobs["b.pdf"]['status'] == 'done'
+    assert worker_pipeline.pool.shut_down
+    wait_for(lambda: not heartbeat_running())
+
+
+def test_worker_stops_renewing_leases_when_it_dies(queue, worker_pipeline, monkeypatch):
+    queue.enqueue("alice", "a.pdf", b"1")
+
+    def broken_claim(worker_id):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(queue, 'claim', broken_claim)
+
+    with pytest.raises(RuntimeError):
+        run_worker(queue, FakeLoader(), threading.Event(), 0.01)
+
+    assert worker_pipeline.pool.shut_down
+    wait_for(lambda: not heartbeat_running())
+
+
+def test_concurrent_sessions_start_one_worker(queue, worker_pipeline):
+    ready = threading.Barrier(8)
+    workers = []
+
+    def session():
+        ready.wait()
+        workers.append(queue.start_worker(FakeLoader()))
+
+    sessions = [threading.Thread(target=session) for _ in range(8)]
+    for thread in sessions:
+        thread.start()
+    for thread in sessions:
+        thread.join()
+    queue.stop_worker(5)
+
+    assert len(workers) == 8
+    assert all(worker is workers[0] for worker in workers)
+    assert not workers[0].is_alive()
+
+
+def test_copies_run_in_a_later_batch_than_the_original(queue, worker_pipeline):
+    worker_pipeline.pool.max_workers = 3
+    worker_pipeline.outcomes["copy.pdf"] = {'status': 'skipped', 'reason': "duplicate of a.pdf"}
+    queue.enqueue("alice", "a.pdf", b"1")
+    queue.enqueue("alice", "copy.pdf", b"1")
+    queue.enqueue("alice", "b.pdf", b"2")
+    stop = threading.Event()
+    worker = threading.Thread(target=run_worker, args=(queue, FakeLoader(), stop, 0.01))
+    worker.start()
+
+    wait_for(lambda: not queue.has_unfinished())
+    stop.set()
+    worker.join(5)
+
+    assert [names for names, _ in worker_pipeline.calls] == [["a.pdf"], ["copy.pdf", "b.pdf"]]
@@ -0,0 +1,32 @@
+from src.query_cache import QueryCache, normalize_question
+
+
+def test_normalize_question():
+    assert normalize_question("  What  is the TOTAL?? ") == "what is the total"
+
+
+def test_cached_answer_is_a_copy(registry):
+    cache = QueryCache(registry)
+    key = cache.make_key("What is the total?", 0.1, 5, "gemini")
+    cache.put(key, {'answer': "42", 'sources': [{'page': 1}]})
+
+    result = cache.get(cache.make_key("what is the total", 0.1, 5, "gemini"))
+    result['sources'].append({'page': 2})
+
+    assert cache.get(key) == {'answer': "42", 'sources': [{'page': 1}]}
+    assert cache.hit_rate() == 1.0
+
+
+def test_settings_and_collection_changes_miss(registry):
+    cache = QueryCache(registry)
+    key = cache.make_key("question", 0.1, 5, "gemini")
+    cache.put(key, {'answer': "old"})
+
+    assert cache.get(cache.make_key("question", 0.2, 5, "gemini")) is None
+    assert cache.get(cache.make_key("question", 0.1, 5, "openai")) is None
+
+    registry.add_document("doc", "new.pdf", ["h1"])
+    assert cache.get(cache.make_key("question", 0.1, 5, "gemini")) is None
+
+    registry.clear()
+    assert cache.get(cache.make_key("question", 0.1, 5, "gemini")) is None
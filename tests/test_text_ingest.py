@@ -0,0 +1,71 @@
+from src.text_ingest import is_text_document, iter_text_elements, process_text_document
+
+
+def elements(text, markdown=True):
+    return list(iter_text_elements(text.splitlines(), markdown=markdown))
+
+
+def test_markdown_sections_and_paragraphs():
+    result = elements("# Intro\n\nFirst paragraph.\n\n## Details\nSecond paragraph.\n")
+
+    assert [element.element_type for element in result] == ['text', 'text']
+    assert [element.metadata['section'] for element in result] == ['Intro', 'Details']
+    assert 'First paragraph.' in result[0].content
+
+
+def test_heading_without_body_is_not_an_element():
+    result = elements("# Only a heading\n")
+
+    assert result == []
+
+
+def test_heading_marks_without_a_title_keep_the_following_text():
+    result = elements("#\nfoo bar\n\n###\nAfter the separator\n")
+
+    assert [element.content for element in result] == ["#\nfoo bar\n\n###\nAfter the separator"]
+
+
+def test_heading_followed_by_a_table_is_not_an_element():
+    result = elements("# Sales\n\n| Region | Total |\n|---|---|\n| North | 10 |\n")
+
+    assert [element.element_type for element in result] == ['table']
+
+
+def test_pipe_table_becomes_table_element():
+    result = elements("# Sales\n\n| Region | Total |\n|--------|------:|\n| North | 10 |\n| South | 20 |\n")
+
+    table = result[-1]
+    assert table.element_type == 'table'
+    assert table.metadata['headers'] == ['Region', 'Total']
+    assert table.metadata['rows'] == 2
+    assert table.metadata['columns'] == 2
+    assert table.metadata['section'] == 'Sales'
+
+
+def test_fenced_code_is_kept_verbatim():
+    result = elements("```\n| a | b |\n# not a heading\n    indented\n```\n")
+
+    assert [element.element_type for element in result] == ['text']
+    assert result[0].metadata['section'] is None
+    assert '    indented' in result[0].content
+    assert '# not a heading' in result[0].content
+
+
+def test_plain_text_is_not_parsed_as_markdown():
+    result = elements("# 3 items left\n| not | a table |\n", markdown=False)
+
+    assert [element.element_type for element in result] == ['text']
+    assert result[0].metadata['section'] is None
+
+
+def test_process_text_document_uses_extension(tmp_path):
+    markdown = tmp_path / "notes.md"
+    markdown.write_text("# Title\n\nBody\n", encoding='utf-8')
+    plain = tmp_path / "notes.txt"
+    plain.write_text("# Title\n\nBody\n", encoding='utf-8')
+
+    assert process_text_document(markdown)['elements'][0].metadata['section'] == 'Title'
+    assert process_text_document(plain)['elements'][0].metadata['section'] is None
+    assert process_text_document(plain)['metadata']['file_type'] == 'txt'
+    assert is_text_document("notes.MD")
+    assert not is_text_document("scan.pdf")